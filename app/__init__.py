@@ -7,6 +7,7 @@ import time
 import threading
 from flask_caching import Cache
 from app.config import DevelopmentConfig, ProductionConfig
+from app.json_provider import OrjsonProvider, orjson
 
 # Global cache instance
 cache = Cache(config={'CACHE_TYPE': 'SimpleCache', 'CACHE_DEFAULT_TIMEOUT': 300})
@@ -60,6 +61,8 @@ def _get_cached_account_info(app):
 
 def create_app():
     app = Flask(__name__, template_folder='templates')
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
 
     # Load the configuration (choose based on your environment)
     environment = os.getenv('FLASK_ENV', 'development')
@@ -180,7 +183,9 @@ def create_app():
     from app.services.user_data import UserDataStore
     from app.services.thumbnail import ThumbnailService
     app.extensions['user_data'] = UserDataStore()
-    thumb_service = ThumbnailService()
+    thumb_service = ThumbnailService(
+        max_bytes=app.config.get('THUMBNAIL_CACHE_MAX_MB', 512) * 1024 * 1024,
+    )
     app.extensions['thumb_service'] = thumb_service
 
     # Clean up expired thumbnails/previews on startup
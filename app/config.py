@@ -48,7 +48,8 @@ class Config:
 
     # Tunable parameters (override via environment variables)
     ACCOUNT_CACHE_TTL = _safe_int('ACCOUNT_CACHE_TTL', 300)
-    RD_RATE_LIMIT_DELAY = _safe_float('RD_RATE_LIMIT_DELAY', 0.2)
+    RD_RATE_LIMIT_DELAY = _safe_float('RD_RATE_LIMIT_DELAY', 0.0)
+    RD_RATE_LIMIT_RPM = _safe_int('RD_RATE_LIMIT_RPM', 250)
     RD_API_TIMEOUT = _safe_int('RD_API_TIMEOUT', 15)
     RD_CONNECT_TIMEOUT = _safe_int('RD_CONNECT_TIMEOUT', 5)
     JACKETT_TIMEOUT = _safe_int('JACKETT_TIMEOUT', 20)
@@ -62,6 +63,10 @@ class Config:
     RD_MAX_WORKERS = _safe_int('RD_MAX_WORKERS', 4)
     LOG_MAX_BYTES = _safe_int('LOG_MAX_BYTES', 10240)
     THUMBNAIL_MAX_AGE_DAYS = _safe_int('THUMBNAIL_MAX_AGE_DAYS', 7)
+    THUMBNAIL_CACHE_MAX_MB = _safe_int('THUMBNAIL_CACHE_MAX_MB', 512)
+    # Let a front-end server (Apache mod_xsendfile, lighttpd) send cached
+    # thumbnails/previews from disk instead of streaming them through Python
+    USE_X_SENDFILE = os.getenv('USE_X_SENDFILE', 'False') == 'True'
 
 class DevelopmentConfig(Config):
     """Development-specific configuration."""
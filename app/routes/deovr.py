@@ -13,13 +13,17 @@ Usage:
   Open DeoVR → enter http://<your-ip>:5000/deovr in the browser
 """
 
-from flask import Blueprint, jsonify, request, current_app, url_for
+from flask import (
+    Blueprint, Response, jsonify, request, current_app, url_for,
+    stream_with_context,
+)
+import itertools
 import logging
 from app.services.real_debrid import RealDebridService, RealDebridError
 from app.services.file_helper import FileHelper
 from app.services.vr_helper import (
     is_video, guess_projection_deovr, launch_heresphere_exe,
-    build_restricted_map,
+    build_restricted_map, iter_downloaded, iter_json_array, DeoVRVideo,
 )
 from app.services.rd_cache import (
     get_torrent_info_cached, get_all_torrents_cached, batch_unrestrict,
@@ -88,43 +92,42 @@ def library_index():
         logger.error(f"Failed to fetch torrents for DeoVR library: {e}")
         return jsonify({"status": "error", "error": "Failed to fetch torrent library from Real-Debrid"}), 500
 
-    # Build the video list in DeoVR shortened format
-    video_list = []
-    for torrent in torrents:
-        if torrent.get('status') != 'downloaded':
-            continue
-
-        torrent_id = torrent.get('id', '')
-        filename = torrent.get('filename', 'Unknown')
-
-        # Use the HereSphere thumbnail endpoint — works for DeoVR too
-        thumb_url = url_for(
-            'heresphere.thumbnail',
-            torrent_id=torrent_id,
-            _external=True,
-        )
-
-        video_list.append({
-            "title": FileHelper.simplify_filename(filename),
-            "videoLength": 0,
-            "thumbnailUrl": thumb_url,
-            "video_url": url_for(
-                'deovr.video_detail',
-                torrent_id=torrent_id,
-                _external=True
-            ),
-        })
-
-    response = {
-        "authorized": "1",
-        "scenes": [{
-            "name": "Real-Debrid Library",
-            "list": video_list,
-        }],
-    }
+    # Stream the video list in DeoVR shortened format, one entry at a time
+    def _videos():
+        count = 0
+        for torrent in iter_downloaded(torrents):
+            torrent_id = torrent.get('id', '')
+            filename = torrent.get('filename', 'Unknown')
 
-    logger.info(f"DeoVR library: returning {len(video_list)} videos")
-    return jsonify(response)
+            # Use the HereSphere thumbnail endpoint — works for DeoVR too
+            thumb_url = url_for(
+                'heresphere.thumbnail',
+                torrent_id=torrent_id,
+                _external=True,
+            )
+
+            count += 1
+            yield DeoVRVideo(
+                title=FileHelper.simplify_filename(filename),
+                videoLength=0,
+                thumbnailUrl=thumb_url,
+                video_url=url_for(
+                    'deovr.video_detail',
+                    torrent_id=torrent_id,
+                    _external=True
+                ),
+            )
+        logger.info(f"DeoVR library: returned {count} videos")
+
+    body = iter_json_array(
+        '{"authorized": "1", "scenes": [{"name": "Real-Debrid Library", "list": [',
+        _videos(),
+        ']}]}',
+        current_app.json.dumps,
+    )
+    # Build the first entry now, so a failure there is a 500 and not a cut-off 200
+    head = next(body)
+    return Response(stream_with_context(itertools.chain((head,), body)), mimetype='application/json')
 
 
 # ── POST /deovr/<torrent_id> — Video detail ──────────────
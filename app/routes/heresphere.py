@@ -18,19 +18,21 @@ Usage:
 """
 
 from flask import (
-    Blueprint, jsonify, request, current_app, url_for,
-    render_template, send_file,
+    Blueprint, Response, jsonify, request, current_app, url_for,
+    render_template, send_file, stream_with_context,
 )
+import itertools
 import logging
 import os
 import threading
 import time
+import zlib
 from datetime import datetime, timedelta, timezone
 from app.services.real_debrid import RealDebridService, RealDebridError
 from app.services.file_helper import FileHelper
 from app.services.vr_helper import (
     is_video, is_subtitle, guess_projection, launch_heresphere_exe,
-    build_restricted_map, get_video_files,
+    build_restricted_map, get_video_files, iter_downloaded, iter_json_array,
 )
 from app.services.rd_cache import (
     get_torrent_info_cached, get_all_torrents_cached, batch_unrestrict,
@@ -253,9 +255,7 @@ def library_index():
     if _wants_html():
         user_data = _get_user_data()
         videos = []
-        for t in torrents:
-            if t.get('status') != 'downloaded':
-                continue
+        for t in iter_downloaded(torrents):
             filename = t.get('filename', 'Unknown')
             torrent_id = t.get('id', '')
             projection, stereo, fov, _lens = guess_projection(filename)
@@ -287,10 +287,7 @@ def library_index():
     user_data = _get_user_data()
     favorites, recent, this_month, older = [], [], [], []
 
-    for torrent in torrents:
-        if torrent.get('status') != 'downloaded':
-            continue
-
+    for torrent in iter_downloaded(torrents):
         torrent_id = torrent.get('id', '')
         detail_url = url_for(
             'heresphere.video_detail',
@@ -323,10 +320,11 @@ def library_index():
 
     total = len(recent) + len(this_month) + len(older)
     scan_url = url_for('heresphere.scan', _external=True)
-    response = {"access": 1, "library": library, "scan": scan_url}
 
+    # The sections need a full pass (favorites go first), so the payload is
+    # already built; encode it in one go rather than streaming it
     logger.info(f"HereSphere library: returning {total} videos in {len(library)} sections")
-    resp = jsonify(response)
+    resp = jsonify({"access": 1, "library": library, "scan": scan_url})
     resp.headers['HereSphere-JSON-Version'] = '1'
     return resp
 
@@ -354,15 +352,49 @@ def scan():
         return jsonify([]), 500
 
     user_data = _get_user_data()
-    scan_data = []
-    for torrent in torrents:
-        if torrent.get('status') != 'downloaded':
-            continue
-        scan_data.append(_build_scan_entry(torrent, user_data))
 
-    logger.info(f"HereSphere scan: returning metadata for {len(scan_data)} videos")
-    resp = jsonify({"scanData": scan_data})
+    # Serialize each entry as it is built rather than holding the whole scan
+    def _entries():
+        count = 0
+        for torrent in iter_downloaded(torrents):
+            count += 1
+            yield _build_scan_entry(torrent, user_data)
+        logger.info(f"HereSphere scan: returned metadata for {count} videos")
+
+    body = iter_json_array('{"scanData": [', _entries(), ']}', current_app.json.dumps)
+    # Build the first entry now, so a failure there is a 500 and not a cut-off 200
+    head = next(body)
+    resp = Response(stream_with_context(itertools.chain((head,), body)), mimetype='application/json')
+    resp.headers['HereSphere-JSON-Version'] = '1'
+    return resp
+
+
+def _detail_etag(torrent_data, base_response, needs_media):
+    """Weak ETag for a detail response, or None when RD returns no hash.
+
+    The torrent hash alone does not pin the response: file selection and
+    RD's hoster links can change under the same hash, so both are folded in
+    along with the user-editable fields (favorite, rating, playback).
+    """
+    info_hash = torrent_data.get('hash')
+    if not info_hash:
+        return None
+    state = (
+        torrent_data.get('files'), torrent_data.get('links'),
+        needs_media, base_response['rating'], base_response['isFavorite'],
+        base_response['currentTime'], base_response['duration'], base_response['tags'],
+    )
+    return f"{info_hash}-{zlib.crc32(repr(state).encode()):08x}"
+
+
+def _detail_response(payload, etag):
+    """jsonify a detail payload with the HereSphere and caching headers."""
+    resp = jsonify(payload)
     resp.headers['HereSphere-JSON-Version'] = '1'
+    if etag:
+        resp.set_etag(etag, weak=True)
+        resp.cache_control.private = True
+        resp.cache_control.max_age = 5
     return resp
 
 
@@ -468,32 +500,44 @@ def video_detail(torrent_id):
         "writeHSP": False,
     }
 
+    # ── Client already has this exact response: skip unrestricting ──
+    # HereSphere fetches details by POST, so a POST gets the 304 too rather
+    # than RFC 9110's 412. The body only carries write-back fields, which are
+    # applied above and folded into the tag, so the POST acts as a GET here.
+    etag = _detail_etag(torrent_data, base_response, needs_media)
+    if etag and request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+        resp.set_etag(etag, weak=True)
+        return resp
+
     # ── Metadata-only response (initial library scan) ─────────
     if not needs_media:
         base_response["media"] = []
-        resp = jsonify(base_response)
-        resp.headers['HereSphere-JSON-Version'] = '1'
-        return resp
+        return _detail_response(base_response, etag)
 
     # ── Full response with playable sources ───────────────────
     # Build file-ID → restricted-link mapping using positional correspondence
     restricted_map = build_restricted_map(selected_files, links)
 
     # Only unrestrict links for video files (skip non-video to avoid
-    # wasting API calls and 0.2s rate-limit delays per link)
+    # wasting API calls and rate-limit tokens per link)
     video_file_ids = {f.get('id') for f in video_files}
     video_fids = [fid for fid in restricted_map if fid in video_file_ids]
     video_restricted = [restricted_map[fid] for fid in video_fids]
-    video_unrestricted = batch_unrestrict(service, video_restricted)
-    link_map = dict(zip(video_fids, video_unrestricted))
 
-    # Detect and unrestrict subtitle files
+    # Detect subtitle files; unrestrict them in the same batch as the videos
     sub_files = [
         f for f in selected_files
         if is_subtitle(f.get('path', '').split('/')[-1]) and f.get('id') in restricted_map
     ]
     sub_restricted = [restricted_map[f.get('id')] for f in sub_files]
-    sub_unrestricted = batch_unrestrict(service, sub_restricted)
+    unrestricted = batch_unrestrict(service, video_restricted + sub_restricted)
+    # batch_unrestrict falls back to the restricted link on failure; never let
+    # a client revalidate its way into keeping those unplayable links
+    if any(u == r for u, r in zip(unrestricted, video_restricted + sub_restricted)):
+        etag = None
+    link_map = dict(zip(video_fids, unrestricted[:len(video_restricted)]))
+    sub_unrestricted = unrestricted[len(video_restricted):]
 
     subtitle_entries = []
     for f, sub_url in zip(sub_files, sub_unrestricted):
@@ -534,9 +578,7 @@ def video_detail(torrent_id):
     base_response["media"] = media_entries
 
     logger.info(f"HereSphere detail: serving {len(media_entries)} sources for torrent {torrent_id}")
-    resp = jsonify(base_response)
-    resp.headers['HereSphere-JSON-Version'] = '1'
-    return resp
+    return _detail_response(base_response, etag)
 
 
 def _get_direct_video_url(torrent_id):
@@ -590,9 +632,12 @@ def thumbnail(torrent_id):
 
     cached = svc.get_cached_path(torrent_id)
     if cached:
-        resp = send_file(cached, mimetype='image/jpeg')
-        resp.headers['Cache-Control'] = 'public, max-age=86400'
-        return resp
+        try:
+            # Conditional: revalidations with a matching ETag get a bodiless 304
+            return send_file(cached, mimetype='image/jpeg', conditional=True, max_age=86400)
+        except FileNotFoundError:
+            # Evicted by another worker after this one remembered the path
+            svc.forget(torrent_id)
 
     if not svc.available:
         logger.debug("ffmpeg not available — skipping thumbnail generation")
@@ -622,9 +667,7 @@ def preview(torrent_id):
 
     cached = svc.get_cached_preview_path(torrent_id)
     if cached:
-        resp = send_file(cached, mimetype='video/mp4')
-        resp.headers['Cache-Control'] = 'public, max-age=86400'
-        return resp
+        return send_file(cached, mimetype='video/mp4', conditional=True, max_age=86400)
 
     if not svc.available:
         logger.debug("ffmpeg not available — skipping preview generation")
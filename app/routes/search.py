@@ -5,6 +5,7 @@ import json
 import logging
 import time
 import threading
+from werkzeug.exceptions import BadRequest
 from app.services.file_helper import FileHelper
 from app.services.real_debrid import RealDebridError
 from app.services.rd_download_link import RDDownloadLinkService, RDDownloadLinkError
@@ -17,6 +18,22 @@ _active_searches = {}
 _active_searches_lock = threading.Lock()
 
 
+def _validate_search(form):
+    """Return the (query, limit) pair from a search form, or raise BadRequest."""
+    query = form.get("query", "").strip()
+    limit = form.get("limit", "10").strip()
+
+    if not query:
+        logger.warning("Empty search query received.")
+        raise BadRequest("Search query cannot be empty.")
+
+    if not limit.isdigit() or int(limit) < 1:
+        logger.warning(f"Invalid limit value received: {limit}")
+        raise BadRequest("Limit must be a positive integer.")
+
+    return query, int(limit)
+
+
 @search_bp.route('/', methods=['GET', 'POST'])
 def index():
     """Render the search page (GET) or execute a search query (POST)."""
@@ -31,24 +48,16 @@ def index():
 
     # Handle POST request for search functionality
     if request.method == "POST":
-        query = request.form.get("query", "").strip()
-        limit = request.form.get("limit", "10").strip()
-
-        if not query:
-            error = "Search query cannot be empty."
-            logger.warning("Empty search query received.")
-            return render_template('index.html', error=error), 400
-
-        if not limit.isdigit() or int(limit) < 1:
-            error = "Limit must be a positive integer."
-            logger.warning(f"Invalid limit value received: {limit}")
-            return render_template('index.html', error=error), 400
+        try:
+            query, limit = _validate_search(request.form)
+        except BadRequest as e:
+            return render_template('index.html', error=e.description), 400
 
         try:
             overall_start_time = time.perf_counter()
 
             download_service = RDDownloadLinkService(api_key=REAL_DEBRID_API_KEY)
-            result = download_service.search_and_get_links(query, int(limit))
+            result = download_service.search_and_get_links(query, limit)
 
             data = result.get("data")
             script_times_data = result.get("timers", [])
@@ -4,9 +4,9 @@ import os
 import platform
 import re
 import shutil
-import subprocess
+from typing import Optional
 from app.services.real_debrid import RealDebridService, RealDebridError
-from app.services.vr_helper import build_restricted_map
+from app.services.vr_helper import build_restricted_map, launch_detached
 from app.services.rd_cache import get_all_torrents_cached
 
 # Known install paths for VLC (per-platform)
@@ -25,6 +25,23 @@ _VLC_PATHS_BY_OS = {
 }
 _VLC_PATHS = _VLC_PATHS_BY_OS.get(platform.system(), [])
 
+# Resolved VLC executable, filled in on the first successful lookup
+_vlc_path: Optional[str] = None
+
+
+def _find_vlc() -> Optional[str]:
+    """Return the VLC executable path, remembering it once found.
+
+    Misses are not remembered, so installing VLC doesn't need a restart.
+    """
+    global _vlc_path
+    if _vlc_path is None:
+        _vlc_path = (
+            next((p for p in _VLC_PATHS if os.path.isfile(p)), None)
+            or shutil.which("vlc") or shutil.which("vlc.exe")
+        )
+    return _vlc_path
+
 torrent_bp = Blueprint('torrent', __name__)
 logger = logging.getLogger(__name__)
 
@@ -206,18 +223,12 @@ def launch_vlc():
         return jsonify({"error": "No video URL provided"}), 400
 
     try:
-        exe_path = None
-        for path in _VLC_PATHS:
-            if os.path.isfile(path):
-                exe_path = path
-                break
-        if not exe_path:
-            exe_path = shutil.which("vlc") or shutil.which("vlc.exe")
+        exe_path = _find_vlc()
         if not exe_path:
             logger.error("vlc.exe not found in any known location.")
             return jsonify({"error": "VLC not found. Please ensure it is installed."}), 404
 
-        subprocess.Popen([exe_path, video_url])
+        launch_detached([exe_path, video_url])
         return jsonify({"status": "success", "message": "VLC launched"})
     except Exception as e:
         logger.error(f"Failed to launch VLC: {e}")
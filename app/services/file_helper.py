@@ -15,18 +15,20 @@ class FileHelper:
 
     @classmethod
     def load_video_extensions(cls):
-        """Load video extensions from a JSON file (cached after first load)."""
+        """Load video extensions from a JSON file as a frozenset (cached after first load)."""
         if cls._video_extensions is not None:
             return cls._video_extensions
         try:
             static_folder_path = os.path.join(current_app.root_path, 'static')
             video_extensions_path = os.path.join(static_folder_path, 'video_extensions.json')
             with open(video_extensions_path, 'r') as f:
-                cls._video_extensions = json.load(f).get("video_extensions", [])
+                cls._video_extensions = frozenset(
+                    ext.lower() for ext in json.load(f).get("video_extensions", [])
+                )
             return cls._video_extensions
         except (FileNotFoundError, json.JSONDecodeError) as e:
             logger.error(f"Error loading video extensions from video_extensions.json: {e}")
-            return []
+            return frozenset()
 
     @classmethod
     def load_category_mapping(cls):
@@ -46,8 +48,8 @@ class FileHelper:
     @staticmethod
     def is_video_file(file_name):
         """Check if the given file is a video based on its extension."""
-        video_extensions = FileHelper.load_video_extensions()
-        return any(file_name.lower().endswith(ext) for ext in video_extensions)
+        ext = os.path.splitext(file_name)[1].lower()
+        return ext in FileHelper.load_video_extensions()
 
     @staticmethod
     def format_file_size(size_in_bytes):
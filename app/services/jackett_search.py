@@ -77,6 +77,14 @@ class JackettSearchService:
             return [], elapsed
 
         logger.debug(f"Jackett returned {len(xml_data)} bytes of XML.")
+        # An empty RSS feed has no <item> elements; skip building the XML tree.
+        # Anything else (a torznab <error>, an HTML page) goes to the parser,
+        # which logs what went wrong.
+        if b"<channel" in xml_data and b"<item" not in xml_data:
+            logger.warning("No results parsed from Jackett XML.")
+            elapsed = time.perf_counter() - start
+            return [], elapsed
+
         raw_results = self._parse_xml(xml_data)
         if not raw_results:
             logger.warning("No results parsed from Jackett XML.")
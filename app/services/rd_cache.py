@@ -38,19 +38,25 @@ _torrent_cache: Dict[str, dict] = {}
 _torrent_cache_lock = threading.Lock()
 _TORRENT_CACHE_TTL = _safe_int('RD_TORRENT_CACHE_TTL', 300)
 
-# ── All-torrents list cache (TTL configurable) ─────────────────
-_all_torrents_cache: Dict[str, object] = {"data": None, "expires": 0}
+# ── All-torrents list cache (per API key, TTL configurable) ────
+_all_torrents_cache: Dict[Optional[str], dict] = {}
 _all_torrents_lock = threading.Lock()
+# One refill at a time per key; concurrent misses wait and reuse the result
+_all_torrents_fetch_locks: Dict[Optional[str], threading.Lock] = {}
 _ALL_TORRENTS_TTL = _safe_int('RD_ALL_TORRENTS_CACHE_TTL', 60)
 
+# ── Concurrent unrestrict calls across all requests ───────────
+# Real-Debrid caps parallel connections per account at 16
+_unrestrict_slots = threading.Semaphore(16)
+
 
 def clear_caches():
     """Reset all caches — used by test fixtures to avoid cross-test leakage."""
     with _torrent_cache_lock:
         _torrent_cache.clear()
     with _all_torrents_lock:
-        _all_torrents_cache["data"] = None
-        _all_torrents_cache["expires"] = 0
+        _all_torrents_cache.clear()
+        _all_torrents_fetch_locks.clear()
 
 
 def get_torrent_info_cached(service, torrent_id: str) -> dict:
@@ -66,23 +72,55 @@ def get_torrent_info_cached(service, torrent_id: str) -> dict:
     return data
 
 
+def _cached_all_torrents(key: Optional[str]) -> Optional[list]:
+    """Return the unexpired list for key, or None. Caller holds the lock."""
+    entry = _all_torrents_cache.get(key)
+    if entry is not None and entry["expires"] > time.time():
+        return entry["data"]
+    return None
+
+
 def get_all_torrents_cached(service) -> list:
-    """Fetch all torrents with a short TTL cache to avoid repeated API calls."""
-    now = time.time()
-    with _all_torrents_lock:
-        if _all_torrents_cache["data"] is not None and _all_torrents_cache["expires"] > now:
-            return _all_torrents_cache["data"]
+    """Fetch all torrents with a short TTL cache to avoid repeated API calls.
 
-    data = service.get_all_torrents()
+    Entries are keyed by the service's API key. When several requests miss
+    at once (e.g. two VR headsets opening the library), only one of them
+    pages through Real-Debrid; the rest wait for it and reuse its result.
+    """
+    key = getattr(service, 'api_key', None)
     with _all_torrents_lock:
-        _all_torrents_cache["data"] = data
-        _all_torrents_cache["expires"] = now + _ALL_TORRENTS_TTL
+        data = _cached_all_torrents(key)
+        if data is not None:
+            return data
+        fetch_lock = _all_torrents_fetch_locks.setdefault(key, threading.Lock())
+
+    with fetch_lock:
+        with _all_torrents_lock:
+            data = _cached_all_torrents(key)
+        if data is not None:
+            return data
+        data = service.get_all_torrents()
+        with _all_torrents_lock:
+            _all_torrents_cache[key] = {"data": data, "expires": time.time() + _ALL_TORRENTS_TTL}
     return data
 
 
-def batch_unrestrict(service, links: List[str], max_workers: int = 3) -> List[str]:
+def _max_workers(default: int = 4) -> int:
+    """Read RD_MAX_WORKERS from Flask config, falling back to default."""
+    try:
+        from flask import current_app
+        return current_app.config.get('RD_MAX_WORKERS', default)
+    except RuntimeError:
+        return default
+
+
+def batch_unrestrict(service, links: List[str], max_workers: Optional[int] = None) -> List[str]:
     """Unrestrict multiple links concurrently using a thread pool.
 
+    The pool is sized to min(max_workers, len(links)), with max_workers
+    defaulting to RD_MAX_WORKERS. A process-wide semaphore keeps the total
+    in-flight calls under Real-Debrid's connection cap.
+
     Returns a list of unrestricted URLs in the same order as the input.
     Falls back to the restricted link on per-link failure.
     """
@@ -93,12 +131,19 @@ def batch_unrestrict(service, links: List[str], max_workers: int = 3) -> List[st
 
     def _unrestrict_one(idx: int, link: str) -> Tuple[int, str]:
         try:
-            return idx, service.unrestrict_link(link)
+            with _unrestrict_slots:
+                return idx, service.unrestrict_link(link)
         except Exception as e:
             logger.warning(f"Failed to unrestrict link {idx}: {e}")
             return idx, link
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    workers = min(max_workers or _max_workers(), len(links))
+    if workers <= 1:
+        for i, link in enumerate(links):
+            results[i] = _unrestrict_one(i, link)[1]
+        return [r or links[i] for i, r in enumerate(results)]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
         futures = [executor.submit(_unrestrict_one, i, link) for i, link in enumerate(links)]
         for future in as_completed(futures):
             idx, url = future.result(timeout=60)
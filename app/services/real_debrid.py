@@ -1,7 +1,10 @@
 # app/services/real_debrid.py
 
 import requests
+from requests.adapters import HTTPAdapter
 import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime
 import time
 from flask import current_app
@@ -14,6 +17,75 @@ class RealDebridError(Exception):
     """Custom exception for Real-Debrid service errors."""
     pass
 
+class _TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is free."""
+
+    def __init__(self, capacity: int, refill_per_sec: float):
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        # Reserve the token up front; a negative balance is the wait owed
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._last) * self.refill_per_sec,
+            )
+            self._last = now
+            self._tokens -= 1
+            wait = -self._tokens / self.refill_per_sec
+        if wait > 0:
+            time.sleep(wait)
+
+
+# RD limits requests per account, and services are built per request, so
+# there is one bucket per API key for the whole process
+_buckets: Dict[str, _TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def _shared_bucket(api_key: str, rpm: int) -> _TokenBucket:
+    """Return the process-wide bucket for an API key, allowing rpm requests per minute."""
+    with _buckets_lock:
+        bucket = _buckets.get(api_key)
+        if bucket is None or bucket.capacity != rpm:
+            bucket = _buckets[api_key] = _TokenBucket(rpm, rpm / 60.0)
+        return bucket
+
+
+# Keep-alive connections outlive the per-request service objects; the pool
+# matches batch_unrestrict's concurrency cap so parallel calls never queue
+_POOL_SIZE = 16
+# The app runs with one configured key; the cap only bounds keys passed explicitly
+_MAX_SESSIONS = 4
+_sessions: 'OrderedDict[str, requests.Session]' = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+def _shared_session(api_key: str) -> requests.Session:
+    """Return the process-wide pooled session for an API key (small LRU)."""
+    with _sessions_lock:
+        session = _sessions.get(api_key)
+        if session is not None:
+            _sessions.move_to_end(api_key)
+            return session
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=_POOL_SIZE)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['Authorization'] = f'Bearer {api_key}'
+        _sessions[api_key] = session
+        # An evicted session may still be in use by a running request, so it
+        # is not closed here; its pool is released once nothing references it
+        if len(_sessions) > _MAX_SESSIONS:
+            _sessions.popitem(last=False)
+        return session
+
+
 class RealDebridService:
     """Service for interacting with the Real-Debrid API."""
 
@@ -24,27 +96,34 @@ class RealDebridService:
             logger.error("REAL_DEBRID_API_KEY is not set.")
             raise RealDebridError("Real-Debrid API key is missing.")
 
-        # Reusable session for connection pooling
-        self._session = requests.Session()
-        self._session.headers['Authorization'] = f'Bearer {self.api_key}'
+        # Shared session so connections are pooled across requests
+        self._session = _shared_session(self.api_key)
 
         # Legacy attribute kept for compatibility
         self.headers = dict(self._session.headers)
 
         # Read timeouts from config (with fallbacks for non-Flask contexts)
         try:
-            self.request_delay = current_app.config.get('RD_RATE_LIMIT_DELAY', 0.2)
+            self.request_delay = current_app.config.get('RD_RATE_LIMIT_DELAY', 0)
+            rpm = current_app.config.get('RD_RATE_LIMIT_RPM', 250)
             connect = current_app.config.get('RD_CONNECT_TIMEOUT', 5)
             read = current_app.config.get('RD_API_TIMEOUT', 15)
         except RuntimeError:
-            self.request_delay = 0.2
+            self.request_delay = 0
+            rpm = 250
             connect = 5
             read = 15
         self.timeout = (connect, read)
+        self._bucket = _shared_bucket(self.api_key, max(1, rpm))
 
     def _rate_limit(self):
-        """Enforce a simple delay to avoid hitting rate limits."""
-        time.sleep(self.request_delay)
+        """Take a token from the account's per-minute bucket.
+
+        RD_RATE_LIMIT_DELAY (default 0) adds an optional fixed pause on top.
+        """
+        self._bucket.acquire()
+        if self.request_delay:
+            time.sleep(self.request_delay)
 
     def _check_response(self, response):
         """Check response for rate limiting; back off on 429."""
@@ -7,14 +7,21 @@ Extracts a single frame from a remote video URL and caches it to disk.
 HereSphere and DeoVR use the cached thumbnails for library grid display.
 """
 
+import atexit
 import json
 import os
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 import subprocess
 import shutil
 import logging
 import threading
 import time
-from typing import Optional
+import weakref
+from typing import Dict, Iterator, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+import requests
 
 logger = logging.getLogger(__name__)
 
@@ -30,20 +37,73 @@ _DEFAULT_PREVIEW_DIR = os.path.join(
     'previews',
 )
 
+# How much of the file to fetch when extracting a thumbnail from its head
+_HEAD_BYTES = 3 * 1024 * 1024
+
+# Latest seek used on the head bytes: a few MB of high-bitrate VR video often
+# hold only a handful of seconds, so the frame comes earlier than the URL path's
+_HEAD_SEEK_SECONDS = 1
+
+# Thumbnail paths remembered in memory so repeat hits skip the stat() call
+_MEM_CACHE_SIZE = 512
+
+# Memory hits re-stamp the file's atime at most this often, so the on-disk
+# LRU order (rebuilt from atimes after a restart) still reflects them
+_ATIME_REFRESH_SECONDS = 3600
+
+# Default cap on the total size of cached thumbnail JPEGs
+_DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Concurrent background ffmpeg runs; a library grid requests every thumbnail at once
+_GEN_WORKERS = 4
+
+# Services whose pools still need cancelling at interpreter exit
+_live_services: 'weakref.WeakSet[ThumbnailService]' = weakref.WeakSet()
+
+
+def _shutdown_live_services() -> None:
+    """Cancel queued generations of every live ThumbnailService."""
+    for svc in list(_live_services):
+        svc.shutdown()
+
+
+# The pool's workers are non-daemon, and interpreter exit joins them only after
+# they drain the queue; that join happens before plain atexit handlers run.
+# threading._register_atexit (private, but what concurrent.futures itself uses)
+# runs before the join; plain atexit is the fallback where it is missing.
+getattr(threading, '_register_atexit', atexit.register)(_shutdown_live_services)
+
 
 class ThumbnailService:
     """Generate and cache video thumbnails and preview clips via ffmpeg."""
 
     def __init__(self, cache_dir: Optional[str] = None,
-                 preview_dir: Optional[str] = None):
-        self.cache_dir = cache_dir or _DEFAULT_CACHE_DIR
-        self.preview_dir = preview_dir or _DEFAULT_PREVIEW_DIR
+                 preview_dir: Optional[str] = None,
+                 max_bytes: Optional[int] = None):
+        # Absolute, so send_file / X-Sendfile never resolve against the app root
+        self.cache_dir = os.path.abspath(cache_dir or _DEFAULT_CACHE_DIR)
+        self.preview_dir = os.path.abspath(preview_dir or _DEFAULT_PREVIEW_DIR)
         os.makedirs(self.cache_dir, exist_ok=True)
         os.makedirs(self.preview_dir, exist_ok=True)
         self._ffmpeg = shutil.which('ffmpeg')
         self._ffprobe = shutil.which('ffprobe')
-        self._generating = set()  # torrent IDs currently being generated
+        self._pool = ThreadPoolExecutor(max_workers=_GEN_WORKERS,
+                                        thread_name_prefix='thumbnail')
+        # Cancel queued generations at shutdown instead of running them all
+        _live_services.add(self)
+        self._inflight: Dict[str, Future] = {}  # torrent ID → queued/running generation
         self._gen_lock = threading.Lock()
+        # Container extensions whose head bytes ffmpeg could not decode; later
+        # files of that type go straight to the URL fallback (one fetch, not two)
+        self._head_misses: Set[str] = set()
+        # torrent ID → (thumbnail path, when its atime was last stamped), LRU
+        self._mem: OrderedDict[str, Tuple[str, float]] = OrderedDict()
+        self._mem_lock = threading.Lock()
+        # On-disk LRU over the whole cache directory, ordered by file atime.
+        # Rescanned on every write, so the cap holds across gunicorn workers
+        # sharing the directory, and the order persists across restarts.
+        self.max_bytes = _DEFAULT_MAX_BYTES if max_bytes is None else max_bytes
+        self._disk_lock = threading.Lock()
 
     @property
     def available(self) -> bool:
@@ -120,18 +180,185 @@ class ThumbnailService:
             logger.warning(f"ffprobe failed for {torrent_id}: {e}")
             return 0
 
+    def _fetch_head(self, url: str, n_bytes: int = _HEAD_BYTES) -> Iterator[bytes]:
+        """Yield at most n_bytes from the start of url via an HTTP Range request."""
+        with requests.get(
+            url,
+            headers={'Range': f'bytes=0-{n_bytes - 1}'},
+            stream=True,
+            timeout=self._get_timeout('FFMPEG_THUMB_TIMEOUT', 30),
+        ) as response:
+            response.raise_for_status()
+            remaining = n_bytes
+            # Servers that ignore Range send the whole file; stop at the cap
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                if not chunk:
+                    continue
+                yield chunk[:remaining]
+                remaining -= len(chunk)
+                if remaining <= 0:
+                    break
+
+    def _generate_from_head(self, torrent_id: str, video_url: str,
+                            output_path: str, seek_seconds: int = 10) -> bool:
+        """
+        Extract a frame from the first few MB of the video piped into ffmpeg.
+
+        Seeks min(seek_seconds, _HEAD_SEEK_SECONDS), since the head rarely
+        reaches further. Returns True if the thumbnail was written. Files
+        whose index sits at the end (non-faststart MP4) fail here and fall
+        back to the full URL, having paid for the head fetch as well; after
+        one such miss, that container type skips this path entirely.
+        """
+        if not self._ffmpeg:
+            return False
+        ext = os.path.splitext(urlsplit(video_url).path)[1].lower()
+        if ext in self._head_misses:
+            return False
+        try:
+            head = b''.join(self._fetch_head(video_url))
+        except requests.RequestException as e:
+            logger.debug(f"Head fetch failed for {torrent_id}: {e}")
+            return False
+        if not head:
+            return False
+
+        try:
+            result = subprocess.run(
+                [
+                    self._ffmpeg,
+                    '-ss', str(min(seek_seconds, _HEAD_SEEK_SECONDS)),
+                    '-i', 'pipe:0',
+                    '-frames:v', '1',
+                    '-vf', 'scale=640:-1',
+                    '-q:v', '3',
+                    '-y',
+                    output_path,
+                ],
+                input=head,
+                capture_output=True,
+                timeout=self._get_timeout('FFMPEG_THUMB_TIMEOUT', 30),
+            )
+        except subprocess.TimeoutExpired:
+            logger.debug(f"ffmpeg timed out on head bytes for {torrent_id}")
+            return False
+        if result.returncode == 0 and os.path.isfile(output_path):
+            return True
+        # The fetch worked but the bytes were undecodable: the container's
+        # index is elsewhere, and likely so for other files of this type
+        logger.debug(f"Head bytes undecodable for {torrent_id}; skipping head fetch for '{ext}'")
+        self._head_misses.add(ext)
+        return False
+
     def get_cached_path(self, torrent_id: str) -> Optional[str]:
-        """Return the cached thumbnail path if it exists, else None."""
+        """Return the cached thumbnail path if it exists, else None.
+
+        Hits are remembered in a small in-memory LRU; misses are not, so a
+        thumbnail written by a background generation is picked up next call.
+        Memory hits still re-stamp atime (throttled) for the disk LRU. They
+        skip the stat(), so another worker's eviction can leave one stale;
+        callers that find the file gone call forget().
+        """
+        now = time.time()
+        refresh = False
+        with self._mem_lock:
+            entry = self._mem.get(torrent_id)
+            if entry is not None:
+                self._mem.move_to_end(torrent_id)
+                path, stamped = entry
+                refresh = now - stamped >= _ATIME_REFRESH_SECONDS
+                if refresh:
+                    self._mem[torrent_id] = (path, now)
+        if entry is not None:
+            if not refresh or self._stamp_atime(path, now):
+                return path
+            self.forget(torrent_id)
+
         path = os.path.join(self.cache_dir, f"{torrent_id}.jpg")
-        return path if os.path.isfile(path) else None
+        if not os.path.isfile(path):
+            return None
+        self._stamp_atime(path, now)
+        with self._mem_lock:
+            self._mem[torrent_id] = (path, now)
+            if len(self._mem) > _MEM_CACHE_SIZE:
+                self._mem.popitem(last=False)
+        return path
+
+    def forget(self, torrent_id: str) -> None:
+        """Drop a remembered thumbnail path whose file has gone missing."""
+        with self._mem_lock:
+            self._mem.pop(torrent_id, None)
+
+    @staticmethod
+    def _stamp_atime(path: str, now: float) -> bool:
+        """Record an access in atime only; cleanup() ages files by mtime.
+
+        Returns False if the file no longer exists.
+        """
+        try:
+            os.utime(path, (now, os.path.getmtime(path)))
+        except FileNotFoundError:
+            return False
+        except OSError:
+            pass
+        return True
+
+    # ── Size-capped disk LRU ───────────────────────────────────
+
+    def _load_disk_lru(self) -> 'OrderedDict[str, int]':
+        """Index cached JPEGs by atime, least recently used first."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.jpg'):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:  # evicted by another worker mid-scan
+                    continue
+                entries.append((st.st_atime, entry.name[:-4], st.st_size))
+        entries.sort()
+        return OrderedDict((tid, size) for _, tid, size in entries)
+
+    def _enforce_disk_cap(self, torrent_id: str) -> None:
+        """Evict the least recently used thumbnails once the directory exceeds max_bytes.
+
+        The directory is rescanned each time: a library of a few thousand
+        JPEGs scans in milliseconds, next to seconds of ffmpeg per write,
+        and other workers' writes and evictions are then accounted for.
+        Memory-LRU hits stamp atime at most hourly, so recency is that coarse.
+        """
+        evicted = []
+        with self._disk_lock:
+            disk = self._load_disk_lru()
+            total = sum(disk.values())
+            # Never evict the thumbnail that was just written
+            disk.pop(torrent_id, None)
+            while total > self.max_bytes and disk:
+                old_id, old_size = disk.popitem(last=False)
+                total -= old_size
+                evicted.append(old_id)
+
+        for old_id in evicted:
+            with self._mem_lock:
+                self._mem.pop(old_id, None)
+            for old_path in (os.path.join(self.cache_dir, f"{old_id}.jpg"),
+                             self._meta_path(old_id)):
+                try:
+                    os.remove(old_path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"Failed to evict {old_path}: {e}")
+        if evicted:
+            logger.info(f"Thumbnail cache over {self.max_bytes} bytes: evicted {len(evicted)}")
 
     def generate(self, torrent_id: str, video_url: str,
                  seek_seconds: int = 10) -> Optional[str]:
         """
         Extract a single frame from a remote video URL using ffmpeg.
 
-        Uses HTTP range requests so only a few MB are downloaded, not the
-        entire file.  The result is cached to disk as a 640px-wide JPEG.
+        First tries the first few MB fetched with one Range request and piped
+        into ffmpeg, then falls back to letting ffmpeg seek the URL itself.
+        The result is cached to disk as a 640px-wide JPEG.
 
         Returns the path to the cached file, or None on failure.
         """
@@ -146,6 +373,15 @@ class ThumbnailService:
 
         output_path = os.path.join(self.cache_dir, f"{torrent_id}.jpg")
 
+        # The seek_seconds=0 retry below already went through the head path
+        if seek_seconds > 0 and self._generate_from_head(torrent_id, video_url,
+                                                         output_path, seek_seconds):
+            size = os.path.getsize(output_path)
+            logger.info(f"Thumbnail generated from head bytes for {torrent_id}: {size} bytes")
+            self._enforce_disk_cap(torrent_id)
+            self.probe_duration(torrent_id, video_url)
+            return output_path
+
         try:
             result = subprocess.run(
                 [
@@ -165,6 +401,7 @@ class ThumbnailService:
             if result.returncode == 0 and os.path.isfile(output_path):
                 size = os.path.getsize(output_path)
                 logger.info(f"Thumbnail generated for {torrent_id}: {size} bytes")
+                self._enforce_disk_cap(torrent_id)
                 # Opportunistically probe duration while we have the URL
                 self.probe_duration(torrent_id, video_url)
                 return output_path
@@ -187,35 +424,41 @@ class ThumbnailService:
             logger.error(f"Thumbnail generation error for {torrent_id}: {e}")
             return None
 
-    def generate_async(self, torrent_id: str, video_url: str):
+    def generate_async(self, torrent_id: str, video_url: str) -> bool:
         """
-        Start thumbnail generation in a background thread.
+        Queue thumbnail generation on the background worker pool.
 
-        Returns True if generation was started, False if already cached
-        or already in progress.
+        At most _GEN_WORKERS ffmpeg processes run at once; further requests
+        wait in the pool's queue. Each torrent ID is queued at most once.
+
+        Returns True if generation was queued, False if already cached
+        or already queued/in progress.
         """
         if self.get_cached_path(torrent_id):
             return False
         with self._gen_lock:
-            if torrent_id in self._generating:
+            if torrent_id in self._inflight:
                 return False
-            self._generating.add(torrent_id)
-
-        def _worker():
             try:
-                self.generate(torrent_id, video_url)
-            finally:
-                with self._gen_lock:
-                    self._generating.discard(torrent_id)
-
-        thread = threading.Thread(target=_worker, daemon=True)
-        thread.start()
+                future = self._pool.submit(self.generate, torrent_id, video_url)
+            except RuntimeError:  # pool already shut down
+                return False
+            self._inflight[torrent_id] = future
+        future.add_done_callback(lambda _: self._forget_inflight(torrent_id))
         return True
 
+    def shutdown(self) -> None:
+        """Cancel queued thumbnail generations; running ones finish on their own."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _forget_inflight(self, torrent_id: str) -> None:
+        with self._gen_lock:
+            self._inflight.pop(torrent_id, None)
+
     def is_generating(self, torrent_id: str) -> bool:
-        """Return True if a background generation is in progress."""
+        """Return True if a background generation is queued or running."""
         with self._gen_lock:
-            return torrent_id in self._generating
+            return torrent_id in self._inflight
 
     # ── Preview clip generation ───────────────────────────────
 
@@ -307,6 +550,9 @@ class ThumbnailService:
         """
         cutoff = time.time() - (max_age_days * 86400)
         deleted = 0
+        # Files are about to disappear from disk; forget remembered paths
+        with self._mem_lock:
+            self._mem.clear()
         for directory in (self.cache_dir, self.preview_dir):
             if not os.path.isdir(directory):
                 continue
@@ -7,7 +7,9 @@ Consolidates video detection, projection guessing, and HereSphere launcher
 logic that was previously duplicated across heresphere.py and deovr.py.
 """
 
+import functools
 import os
+from dataclasses import dataclass
 import shutil
 import subprocess
 import logging
@@ -42,11 +44,28 @@ def is_subtitle(filename):
     return any(lower.endswith(ext) for ext in SUBTITLE_EXTS)
 
 
+# Filename tokens that mark top/bottom stereo; anything else is SBS
+_TB_TOKENS = ('_TB', '_OU')
+
+# (filename tokens, projection, fov, lens), checked in order; first match wins.
+# _FISHEYE190 and the MKX lenses must precede the generic _FISHEYE rule.
+_PROJECTION_RULES = (
+    (('_FISHEYE190', '_RF52'), 'fisheye', 190.0, 'Linear'),
+    (('_MKX200',), 'fisheye', 200.0, 'MKX200'),
+    (('_MKX220',), 'fisheye', 220.0, 'MKX220'),
+    (('_FISHEYE',), 'fisheye', 180.0, 'Linear'),
+    (('_360',), 'equirectangular360', 360.0, 'Linear'),
+    (('_FLAT', '_2D'), 'perspective', 90.0, 'Linear'),
+)
+
+
+@functools.lru_cache(maxsize=4096)
 def guess_projection(filename):
     """
     Guess VR projection from filename conventions.
 
-    Returns (projection, stereo, fov, lens) tuple.
+    Returns (projection, stereo, fov, lens) tuple. Results are memoized,
+    since library listings re-check the same filenames on every request.
 
     Common patterns:
       _180_SBS, _180x180_SBS  → equirectangular, sbs, 180, Linear
@@ -60,40 +79,17 @@ def guess_projection(filename):
     """
     upper = filename.upper()
 
-    # Stereo mode
-    if '_TB' in upper or '_OU' in upper:
-        stereo = 'tb'
+    stereo = 'tb' if any(t in upper for t in _TB_TOKENS) else 'sbs'
+
+    for tokens, projection, fov, lens in _PROJECTION_RULES:
+        if any(t in upper for t in tokens):
+            break
     else:
-        stereo = 'sbs'  # SBS is the most common default
-
-    # FOV & Lens
-    fov = 180.0
-    lens = 'Linear'
-
-    # Screen type / projection
-    if '_FISHEYE190' in upper or '_RF52' in upper:
-        projection = 'fisheye'
-        fov = 190.0
-    elif '_MKX200' in upper:
-        projection = 'fisheye'
-        fov = 200.0
-        lens = 'MKX200'
-    elif '_MKX220' in upper:
-        projection = 'fisheye'
-        fov = 220.0
-        lens = 'MKX220'
-    elif '_FISHEYE' in upper:
-        projection = 'fisheye'
-        fov = 180.0
-    elif '_360' in upper:
-        projection = 'equirectangular360'
-        fov = 360.0
-    elif '_FLAT' in upper or '_2D' in upper:
-        projection = 'perspective'
+        # 180° equirect is the most common VR format
+        projection, fov, lens = 'equirectangular', 180.0, 'Linear'
+
+    if projection == 'perspective':
         stereo = 'mono'
-        fov = 90.0
-    else:
-        projection = 'equirectangular'  # 180° equirect is the most common VR format
 
     return projection, stereo, fov, lens
 
@@ -111,6 +107,7 @@ _DEOVR_SCREEN_TYPE_MAP = {
 _DEOVR_FISHEYE_OVERRIDES = {'MKX200': 'mkx200', 'MKX220': 'mkx200'}
 
 
+@functools.lru_cache(maxsize=4096)
 def guess_projection_deovr(filename):
     """
     Guess VR projection for DeoVR format.
@@ -156,6 +153,25 @@ def build_restricted_map(selected_files, links):
     return restricted_map
 
 
+@dataclass(slots=True, frozen=True)
+class DeoVRVideo:
+    """One entry in a DeoVR scene list.
+
+    Field names are the DeoVR JSON keys, declared in sorted order so
+    orjson's native dataclass output matches the sorted-key encoding
+    (checked by test_json_dataclass_fields_are_sorted).
+    """
+    thumbnailUrl: str
+    title: str
+    videoLength: int
+    video_url: str
+
+
+def iter_downloaded(torrents):
+    """Lazily yield the torrents whose status is 'downloaded'."""
+    return (t for t in torrents if t.get('status') == 'downloaded')
+
+
 def get_video_files(selected_files):
     """Filter selected torrent files to only video files.
 
@@ -169,6 +185,49 @@ def get_video_files(selected_files):
     return video_files
 
 
+_END = object()
+
+
+def iter_json_array(prefix, items, suffix, dumps):
+    """Yield a JSON document whose array is serialized one item at a time.
+
+    prefix and suffix are the raw JSON text around the array, e.g.
+    '{"scanData": [' and ']}'. Lets large library listings stream out
+    without building the whole payload first.
+
+    The first chunk already holds the first item, so a route that primes the
+    generator with next() before returning turns an error there into a
+    normal 500. A later error, after the 200 has been sent, propagates and
+    drops the connection: the client sees a failed request instead of a
+    well-formed but silently shortened list.
+    """
+    items = iter(items)
+    first = next(items, _END)
+    if first is _END:
+        yield prefix + suffix
+        return
+    yield prefix + dumps(first)
+    for item in items:
+        yield ',' + dumps(item)
+    yield suffix
+
+
+def launch_detached(args):
+    """Start a desktop player without waiting on it or sharing our stdio.
+
+    The child gets its own session, so it outlives a server restart and
+    never receives the Flask process's Ctrl+C.
+    """
+    return subprocess.Popen(
+        args,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        close_fds=True,
+        start_new_session=True,
+    )
+
+
 def launch_heresphere_exe(video_url):
     """
     Launch HereSphere.exe with the given video URL.
@@ -181,7 +240,7 @@ def launch_heresphere_exe(video_url):
         return False, "HereSphere.exe not found. Please ensure it is installed via Steam."
 
     try:
-        subprocess.Popen([exe_path, video_url])
+        launch_detached([exe_path, video_url])
         return True, None
     except Exception as e:
         logger.error(f"Failed to launch HereSphere: {e}")
@@ -1,6 +1,16 @@
+import copy
+import gc
 import os
 import pytest
 import responses
+from responses.registries import FirstMatchRegistry
+from unittest.mock import MagicMock, create_autospec
+from urllib.parse import urlsplit
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is a core dependency
+    orjson = None
 
 # Ensure required env vars are set BEFORE importing create_app,
 # since the app factory validates them at startup.
@@ -12,12 +22,83 @@ from app import create_app
 
 # Reset caches between tests so mocks fire properly
 from app import _account_cache
+from app.routes.search import _active_searches
 from app.services.rd_cache import clear_caches as _clear_rd_caches
+from app.services.rd_download_link import RDDownloadLinkService
+from app.services.real_debrid import RealDebridService
+
+MOCK_RD_USER = {"id": 12345, "username": "testuser"}
+
+
+def _json_body(response):
+    if orjson is None:
+        return response.get_json()
+    return orjson.loads(response.data)
 
 
 @pytest.fixture
+def json_body():
+    """Decode a JSON response body, with orjson when it is installed."""
+    return _json_body
+
+
+def _strip_query(url):
+    return urlsplit(url)._replace(query="", fragment="").geturl()
+
+
+class _FastRegistry(FirstMatchRegistry):
+    """FirstMatchRegistry with a (method, url) index for plain-string URLs.
+
+    A request whose key maps to exactly one registered response is answered
+    from the index; anything else (regex URLs, duplicate registrations that
+    rely on first-match popping) falls back to the linear scan.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._index = None
+
+    def _build_index(self):
+        index = {}
+        for response in self.registered:
+            if not isinstance(response.url, str):
+                return {}
+            key = (response.method, _strip_query(response.url))
+            index.setdefault(key, []).append(response)
+        return index
+
+    def find(self, request):
+        if self._index is None:
+            self._index = self._build_index()
+        hits = self._index.get((request.method, _strip_query(request.url)))
+        if hits and len(hits) == 1:
+            match_result, _ = hits[0].matches(request)
+            if match_result:
+                return hits[0], []
+        # The linear scan may pop a response, so rebuild on the next lookup
+        self._index = None
+        return super().find(request)
+
+    def add(self, response):
+        self._index = None
+        return super().add(response)
+
+    def remove(self, response):
+        self._index = None
+        return super().remove(response)
+
+    def replace(self, response):
+        self._index = None
+        return super().replace(response)
+
+    def reset(self):
+        self._index = None
+        super().reset()
+
+
+@pytest.fixture(scope="session")
 def app():
-    """Create and configure a test Flask application."""
+    """Create and configure one test Flask application per session."""
     app = create_app()
     app.config.update({
         "TESTING": True,
@@ -26,28 +107,135 @@ def app():
         "JACKETT_URL": "http://localhost:9117",
         "WTF_CSRF_ENABLED": False,
     })
-    # Reset all caches so each test starts fresh
-    _account_cache["data"] = None
-    _account_cache["error"] = None
-    _account_cache["expires"] = 0
-    _clear_rd_caches()
     yield app
 
 
-@pytest.fixture
+@pytest.fixture(scope="session", autouse=True)
+def _gc_tune(app):
+    """Freeze the session-lifetime objects and collect gen 0 less often.
+
+    Everything allocated while building the app is moved out of the
+    collector's view, and the higher gen-0 threshold cuts GC pauses from the
+    many short-lived mocks and responses created per test.
+    """
+    gc.collect()
+    gc.freeze()
+    old_threshold = gc.get_threshold()
+    gc.set_threshold(50000, 10, 10)
+    yield
+    gc.set_threshold(*old_threshold)
+    gc.unfreeze()
+
+
+@pytest.fixture(scope="session")
+def _base_config(app):
+    """Snapshot of the test config, restored before every test."""
+    return dict(app.config)
+
+
+@pytest.fixture(scope="session")
 def client(app):
-    """A test client for the app."""
-    return app.test_client()
+    """A cookie-less test client for the app.
 
+    None of the tests rely on a session, so skip the cookie jar. Tests that
+    need cookies can build their own ``app.test_client(use_cookies=True)``.
+    """
+    return app.test_client(use_cookies=False)
 
-@pytest.fixture
+
+@pytest.fixture(scope="session")
 def runner(app):
     """A test CLI runner for the app."""
     return app.test_cli_runner()
 
 
+# One worker-local RequestsMock: started for the whole session, so no test
+# can reach the real network, and only reset() between tests.
+_requests_mock = responses.RequestsMock(
+    assert_all_requests_are_fired=False, registry=_FastRegistry
+)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _requests_mock_active():
+    """Patch requests with the shared RequestsMock for the whole session."""
+    _requests_mock.start()
+    yield
+    _requests_mock.stop(allow_assert=False)
+
+
 @pytest.fixture
 def mocked_responses():
-    """Activate the responses library to mock HTTP requests."""
-    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
-        yield rsps
+    """The shared RequestsMock; registrations are wiped by ``_reset_state``."""
+    return _requests_mock
+
+
+@pytest.fixture(autouse=True)
+def _reset_state(app, _base_config):
+    """Restore config, empty caches, wipe mocks and seed the account cache.
+
+    The before_request account lookup is served from the seeded cache, so
+    page requests never reach the /user endpoint. Tests that exercise the
+    real lookup set ``_account_cache["expires"] = 0`` and mock /user.
+    Leftover cancel events in the search route's _active_searches are dropped.
+    """
+    app.config.clear()
+    app.config.update(_base_config)
+    _account_cache["data"] = dict(MOCK_RD_USER)
+    _account_cache["error"] = None
+    _account_cache["expires"] = float("inf")
+    _clear_rd_caches()
+    _active_searches.clear()
+    _requests_mock.reset()
+
+
+@pytest.fixture(scope="session")
+def large_torrents():
+    """1000 downloaded VR torrents for scan/library load tests, built once."""
+    template = {
+        "filename": "Great.VR.Video_180_SBS.mp4",
+        "status": "downloaded",
+        "bytes": 5_000_000_000,
+        "added": "2025-12-01T10:00:00.000Z",
+        "links": ["https://rd.link/1"],
+    }
+    return [{**template, "id": f"id{i}"} for i in range(1000)]
+
+
+@pytest.fixture(scope="session")
+def _rd_service_template():
+    """Autospec'd RealDebridService instance, built once per session."""
+    return create_autospec(RealDebridService, instance=True)
+
+
+@pytest.fixture
+def rd_service(_rd_service_template, monkeypatch):
+    """A RealDebridService mock returned by every route that builds one.
+
+    Configure it with e.g. ``rd_service.get_all_torrents.return_value = [...]``.
+    The copy shares child mocks with the template, so the template is reset
+    after each test.
+    """
+    service = copy.copy(_rd_service_template)
+    for module in ("app.routes.torrent", "app.routes.heresphere", "app.routes.deovr"):
+        monkeypatch.setattr(f"{module}.RealDebridService", lambda *a, **k: service)
+    yield service
+    _rd_service_template.reset_mock(return_value=True, side_effect=True)
+
+
+@pytest.fixture(scope="session")
+def _rd_link_service_template():
+    """Spec'd RDDownloadLinkService mock, built once per session."""
+    return MagicMock(spec=RDDownloadLinkService)
+
+
+@pytest.fixture
+def rd_link_service(_rd_link_service_template, monkeypatch):
+    """The RDDownloadLinkService instance the search routes will construct.
+
+    Configure e.g. ``rd_link_service.search_and_get_links.return_value``.
+    """
+    service = copy.copy(_rd_link_service_template)
+    monkeypatch.setattr("app.routes.search.RDDownloadLinkService", lambda *a, **k: service)
+    yield service
+    _rd_link_service_template.reset_mock(return_value=True, side_effect=True)
@@ -1,82 +1,88 @@
 # tests/test_main.py
 import pytest
-import platform
-from unittest.mock import patch, MagicMock
-
-
-# Test the index route
-def test_index_route(client, mocked_responses):
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200
-    )
-    response = client.get("/")
+import shutil
+import subprocess
+from types import SimpleNamespace
+from typing import Final
+
+from app import _account_cache
+from app.services.real_debrid import RealDebridError
+
+_VLC_URL = "https://example.com/video.mkv"
+_VLC_CMD = ["/usr/bin/vlc", _VLC_URL]
+
+_JACKETT_HASH = "0123456789abcdef0123456789abcdef01234567"
+_JACKETT_XML: Final[bytes] = f"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:torznab="http://torznab.com/schemas/2015/feed">
+  <channel>
+    <item>
+      <title>Alien.Romulus.2160p</title>
+      <size>1073741824</size>
+      <link>magnet:?xt=urn:btih:{_JACKETT_HASH}</link>
+      <torznab:attr name="category" value="2000" />
+      <torznab:attr name="seeders" value="42" />
+      <torznab:attr name="peers" value="7" />
+    </item>
+  </channel>
+</rss>""".encode()
+
+
+# GET smoke tests for the server-rendered pages
+@pytest.mark.parametrize("path,needle", [
+    ("/", b"Debrid Scout"),
+    ("/about", b"About"),
+    ("/contact", b"Contact"),
+    ("/torrent/rd_manager", b"RD Manager"),
+])
+def test_get_route(client, rd_service, path, needle):
+    rd_service.get_all_torrents.return_value = [
+        {"id": "abc123", "filename": "Test.Movie.mkv", "status": "downloaded", "progress": 100}
+    ]
+    response = client.get(path)
     assert response.status_code == 200
-    assert b"Search" in response.data or b"Debrid Scout" in response.data
+    assert needle in response.data
 
 
-# Test the RD Manager route
-def test_rd_manager_route(client, mocked_responses):
+# End-to-end search: torznab XML through Jackett parsing, RD cache check,
+# existing-torrent reuse and link unrestriction.
+@pytest.mark.integration
+def test_search_post_route(client, mocked_responses):
     mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200
+        "http://localhost:9117/api/v2.0/indexers/all/results/torznab/api",
+        body=_JACKETT_XML,
+        content_type="application/rss+xml",
     )
-
-    with patch('app.services.real_debrid.RealDebridService.get_all_torrents') as mock_torrents:
-        mock_torrents.return_value = [
-            {"id": "abc123", "filename": "Test.Movie.mkv", "status": "downloaded", "progress": 100}
-        ]
-
-        response = client.get("/torrent/rd_manager")
-        assert response.status_code == 200
-        assert b"RD Manager" in response.data
-
-
-# Test the About route
-def test_about_route(client, mocked_responses):
     mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200
+        f"https://api.real-debrid.com/rest/1.0/torrents/instantAvailability/{_JACKETT_HASH}",
+        json={},
     )
-    response = client.get("/about")
-    assert response.status_code == 200
-    assert b"About" in response.data
-
-
-# Test the Contact route
-def test_contact_route(client, mocked_responses):
     mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200
+        "https://api.real-debrid.com/rest/1.0/torrents?page=1",
+        json=[{"id": "abc123", "hash": _JACKETT_HASH}],
     )
-    response = client.get("/contact")
-    assert response.status_code == 200
-    assert b"Contact" in response.data
-
-
-# Test the search POST request route
-def test_search_post_route(client, mocked_responses):
+    mocked_responses.get("https://api.real-debrid.com/rest/1.0/torrents?page=2", status=204)
     mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200
+        "https://api.real-debrid.com/rest/1.0/torrents/info/abc123",
+        json={
+            "status": "downloaded",
+            "files": [{"id": 1, "path": "/Alien.Romulus.2160p.mkv", "bytes": 1073741824, "selected": 1}],
+            "links": ["https://real-debrid.com/d/abc123"],
+        },
     )
+    mocked_responses.post(
+        "https://api.real-debrid.com/rest/1.0/unrestrict/link",
+        json={"download": "https://download.real-debrid.com/d/abc123/Alien.Romulus.2160p.mkv"},
+    )
+
     response = client.post("/", data={"query": "alien romulus 2160p", "limit": "10"})
     assert response.status_code == 200
-    assert b"No Results Found" in response.data or b"Total Torrents Found" in response.data
+    html = response.data
+    assert b"Alien Romulus 2160p" in html
+    assert b"https://download.real-debrid.com/d/abc123/Alien.Romulus.2160p.mkv" in html
 
 
 # Test the delete torrent route with actual mock response
-def test_delete_torrent_route(client, mocked_responses):
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200
-    )
+def test_delete_torrent_route(client, mocked_responses, json_body):
     mocked_responses.delete(
         "https://api.real-debrid.com/rest/1.0/torrents/delete/sampleTorrentId",
         status=204,
@@ -84,37 +90,40 @@ def test_delete_torrent_route(client, mocked_responses):
 
     response = client.delete("/torrent/delete_torrent/sampleTorrentId")
     assert response.status_code == 200
-    assert response.json['status'] == 'success'
+    body = json_body(response)
+    assert body['status'] == 'success'
 
 
 # Test the launch VLC route (corrected from /stream_vlc to /launch_vlc)
-def test_launch_vlc_route(client, mocked_responses):
-    test_url = "https://example.com/video.mkv"
+@pytest.mark.vlc
+def test_launch_vlc_route(client, monkeypatch, json_body):
+    popen_calls = []
+    monkeypatch.setattr(subprocess, "Popen", lambda *a, **k: popen_calls.append((a, k)) or SimpleNamespace())
+    which_calls = []
+    monkeypatch.setattr(shutil, "which", lambda name: which_calls.append(name) or "/usr/bin/vlc")
+    monkeypatch.setattr("app.routes.torrent._VLC_PATHS", [])
+    monkeypatch.setattr("app.routes.torrent._vlc_path", None)
 
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200
-    )
-
-    with patch('subprocess.Popen') as mock_popen, \
-         patch('shutil.which', return_value="/usr/bin/vlc"):
-        mock_popen.return_value = MagicMock()
+    response = client.post("/torrent/launch_vlc", json={"video_url": _VLC_URL})
 
-        response = client.post("/torrent/launch_vlc", json={"video_url": test_url})
+    assert response.status_code == 200
+    body = json_body(response)
+    assert body['status'] == 'success'
+    assert len(popen_calls) == 1
+    args, kwargs = popen_calls[0]
+    assert args[0] == _VLC_CMD
+    # Fire-and-forget: detached session, no inherited stdio
+    assert kwargs["start_new_session"] is True
+    assert kwargs["stdout"] is subprocess.DEVNULL
 
-        assert response.status_code == 200
-        assert response.json['status'] == 'success'
-        mock_popen.assert_called_once_with(["/usr/bin/vlc", test_url])
+    # The executable lookup runs once; later launches reuse it
+    client.post("/torrent/launch_vlc", json={"video_url": _VLC_URL})
+    assert which_calls == ["vlc"]
+    assert len(popen_calls) == 2
 
 
 # Test the unrestrict link route with an actual mock response
-def test_unrestrict_link_route(client, mocked_responses):
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200
-    )
+def test_unrestrict_link_route(client, mocked_responses, json_body):
     mocked_responses.post(
         "https://api.real-debrid.com/rest/1.0/unrestrict/link",
         json={'download': 'https://download.real-debrid.com/d/abc123/movie.mkv'},
@@ -123,16 +132,12 @@ def test_unrestrict_link_route(client, mocked_responses):
 
     response = client.post("/torrent/unrestrict_link", json={"link": "http://example.com/restricted"})
     assert response.status_code == 200
-    assert response.json['unrestricted_link'] == 'https://download.real-debrid.com/d/abc123/movie.mkv'
+    body = json_body(response)
+    assert body['unrestricted_link'] == 'https://download.real-debrid.com/d/abc123/movie.mkv'
 
 
 # Test torrent details route with actual data structure
-def test_get_torrent_details_route(client, mocked_responses):
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200
-    )
+def test_get_torrent_details_route(client, mocked_responses, json_body):
     mocked_responses.get(
         "https://api.real-debrid.com/rest/1.0/torrents/info/sampleTorrentId",
         json={
@@ -156,14 +161,16 @@ def test_get_torrent_details_route(client, mocked_responses):
 
     response = client.get("/torrent/torrents/sampleTorrentId")
     assert response.status_code == 200
-    assert response.json['filename'] == "Test.Movie.2024.mkv"
-    assert response.json['files'][0]['link'] == "https://download.real-debrid.com/d/abc123/Test.Movie.2024.mkv"
+    body = json_body(response)
+    assert body['filename'] == "Test.Movie.2024.mkv"
+    assert body['files'][0]['link'] == "https://download.real-debrid.com/d/abc123/Test.Movie.2024.mkv"
 
 
 # ── Account route smoke test ──────────────────────────────────
 
 def test_account_route(client, mocked_responses):
     """Test that /account/account renders without error."""
+    _account_cache["expires"] = 0
     mocked_responses.get(
         "https://api.real-debrid.com/rest/1.0/user",
         json={"id": 12345, "username": "testuser", "expiration": "2030-01-01T00:00:00.000Z", "premium": 100},
@@ -176,29 +183,18 @@ def test_account_route(client, mocked_responses):
 
 # ── HereSphere scan endpoint tests ───────────────────────────
 
-def test_heresphere_library_includes_scan_url(client, mocked_responses):
+def test_heresphere_library_includes_scan_url(client, rd_service, json_body):
     """The library index JSON should include a 'scan' URL."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
-    with patch('app.services.real_debrid.RealDebridService.get_all_torrents') as mock_torrents:
-        mock_torrents.return_value = []
-        response = client.post("/heresphere/")
-        assert response.status_code == 200
-        data = response.get_json()
-        assert "scan" in data
-        assert "/heresphere/scan" in data["scan"]
+    rd_service.get_all_torrents.return_value = []
+    response = client.post("/heresphere/")
+    assert response.status_code == 200
+    data = json_body(response)
+    assert "scan" in data
+    assert "/heresphere/scan" in data["scan"]
 
 
-def test_heresphere_scan_returns_bulk_metadata(client, mocked_responses):
+def test_heresphere_scan_returns_bulk_metadata(client, rd_service, json_body):
     """POST /heresphere/scan returns metadata for all downloaded torrents."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
     torrents = [
         {
             "id": "abc123",
@@ -225,98 +221,110 @@ def test_heresphere_scan_returns_bulk_metadata(client, mocked_responses):
             "links": [],
         },
     ]
-    with patch('app.services.real_debrid.RealDebridService.get_all_torrents') as mock_torrents:
-        mock_torrents.return_value = torrents
-        response = client.post("/heresphere/scan")
-        assert response.status_code == 200
-        body = response.get_json()
-        assert "scanData" in body
-        data = body["scanData"]
-        # Only 2 downloaded torrents should be in the response
-        assert len(data) == 2
-        # Each entry has required HereSphere scan fields
-        for entry in data:
-            assert "link" in entry
-            assert "title" in entry
-            assert "tags" in entry
-            assert "dateAdded" in entry
-            assert "duration" in entry
-            assert "isFavorite" in entry
-        # Check specific entries
-        assert data[0]["title"] == "Great VR Video_180_SBS.mp4"
-        assert "/heresphere/abc123" in data[0]["link"]
-        # Tags should include VR projection info
-        tag_names = [t["name"] for t in data[0]["tags"]]
-        assert any("180" in name for name in tag_names)
-
-
-def test_heresphere_scan_empty_library(client, mocked_responses):
+    rd_service.get_all_torrents.return_value = torrents
+    response = client.post("/heresphere/scan")
+    assert response.status_code == 200
+    body = json_body(response)
+    assert "scanData" in body
+    data = body["scanData"]
+    # Only 2 downloaded torrents should be in the response
+    assert len(data) == 2
+    # Each entry has required HereSphere scan fields
+    for entry in data:
+        assert "link" in entry
+        assert "title" in entry
+        assert "tags" in entry
+        assert "dateAdded" in entry
+        assert "duration" in entry
+        assert "isFavorite" in entry
+    # Check specific entries
+    assert data[0]["title"] == "Great VR Video_180_SBS.mp4"
+    assert "/heresphere/abc123" in data[0]["link"]
+    # Tags should include VR projection info
+    tag_names = [t["name"] for t in data[0]["tags"]]
+    assert any("180" in name for name in tag_names)
+
+
+def test_heresphere_scan_first_entry_error_is_not_streamed(client, rd_service, monkeypatch, large_torrents):
+    """A failure building the first entry raises before any 200 is sent."""
+    rd_service.get_all_torrents.return_value = large_torrents[:2]
+
+    def broken(torrent, user_data):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr("app.routes.heresphere._build_scan_entry", broken)
+    # TESTING propagates the error; in production it becomes a 500
+    with pytest.raises(RuntimeError):
+        client.post("/heresphere/scan")
+
+
+def test_heresphere_scan_later_entry_error_propagates(client, rd_service, monkeypatch, large_torrents):
+    """A failure after streaming starts breaks the body instead of shortening it."""
+    rd_service.get_all_torrents.return_value = large_torrents[:3]
+    entries = iter([{"title": "first"}, RuntimeError("boom")])
+
+    def flaky(torrent, user_data):
+        entry = next(entries)
+        if isinstance(entry, Exception):
+            raise entry
+        return entry
+
+    monkeypatch.setattr("app.routes.heresphere._build_scan_entry", flaky)
+    response = client.post("/heresphere/scan")
+    assert response.status_code == 200
+    with pytest.raises(RuntimeError, match="boom"):
+        response.get_data()
+
+
+def test_scan_perf(benchmark, client, rd_service, large_torrents, json_body):
+    """Benchmark POST /heresphere/scan over a large library (timed with --benchmark-enable)."""
+    rd_service.get_all_torrents.return_value = large_torrents
+    # buffered=True so the timing includes serializing the streamed body
+    response = benchmark(lambda: client.post("/heresphere/scan", buffered=True))
+    assert response.status_code == 200
+    assert len(json_body(response)["scanData"]) == len(large_torrents)
+
+
+def test_heresphere_scan_empty_library(client, rd_service, json_body):
     """POST /heresphere/scan returns empty array when no torrents exist."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
-    with patch('app.services.real_debrid.RealDebridService.get_all_torrents') as mock_torrents:
-        mock_torrents.return_value = []
-        response = client.post("/heresphere/scan")
-        assert response.status_code == 200
-        body = response.get_json()
-        assert body == {"scanData": []}
+    rd_service.get_all_torrents.return_value = []
+    response = client.post("/heresphere/scan")
+    assert response.status_code == 200
+    body = json_body(response)
+    assert body == {"scanData": []}
 
 
-def test_heresphere_scan_has_correct_header(client, mocked_responses):
+def test_heresphere_scan_has_correct_header(client, rd_service):
     """POST /heresphere/scan response includes HereSphere-JSON-Version header."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
-    with patch('app.services.real_debrid.RealDebridService.get_all_torrents') as mock_torrents:
-        mock_torrents.return_value = []
-        response = client.post("/heresphere/scan")
-        assert response.headers.get('HereSphere-JSON-Version') == '1'
+    rd_service.get_all_torrents.return_value = []
+    response = client.post("/heresphere/scan")
+    assert response.headers.get('HereSphere-JSON-Version') == '1'
 
 
 # ── /health endpoint tests ─────────────────────────────────────
-def test_health_endpoint_returns_healthy(client, mocked_responses):
+def test_health_endpoint_returns_healthy(client, json_body):
     """GET /health returns 200 with healthy status when keys are set."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
     response = client.get("/health")
     assert response.status_code == 200
-    body = response.get_json()
+    body = json_body(response)
     assert body["status"] == "healthy"
     assert body["checks"]["api_key_set"] is True
     assert body["checks"]["jackett_key_set"] is True
 
 
-def test_health_endpoint_degraded_without_jackett(client, mocked_responses):
+def test_health_endpoint_degraded_without_jackett(client, json_body):
     """GET /health returns degraded when JACKETT_API_KEY is missing."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
     client.application.config['JACKETT_API_KEY'] = ''
     response = client.get("/health")
     assert response.status_code == 200
-    body = response.get_json()
+    body = json_body(response)
     assert body["status"] == "degraded"
     assert body["checks"]["jackett_key_set"] is False
 
 
 # ── Bulk delete validation tests ────────────────────────────────
-def test_bulk_delete_rejects_non_list(client, mocked_responses):
+def test_bulk_delete_rejects_non_list(client):
     """POST /torrent/delete_torrents rejects non-list torrentIds."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
     response = client.post(
         "/torrent/delete_torrents",
         json={"torrentIds": "not-a-list"},
@@ -325,30 +333,20 @@ def test_bulk_delete_rejects_non_list(client, mocked_responses):
     assert response.status_code == 400
 
 
-def test_bulk_delete_rejects_invalid_ids(client, mocked_responses):
+def test_bulk_delete_rejects_invalid_ids(client, json_body):
     """POST /torrent/delete_torrents rejects IDs with special characters."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
     response = client.post(
         "/torrent/delete_torrents",
         json={"torrentIds": ["valid123", "../etc/passwd"]},
         content_type="application/json",
     )
     assert response.status_code == 400
-    body = response.get_json()
+    body = json_body(response)
     assert "Invalid torrent ID" in body["error"]
 
 
-def test_bulk_delete_rejects_oversized_array(client, mocked_responses):
+def test_bulk_delete_rejects_oversized_array(client):
     """POST /torrent/delete_torrents rejects arrays larger than 500."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
     response = client.post(
         "/torrent/delete_torrents",
         json={"torrentIds": ["id" + str(i) for i in range(501)]},
@@ -358,13 +356,8 @@ def test_bulk_delete_rejects_oversized_array(client, mocked_responses):
 
 
 # ── VR auth token tests ────────────────────────────────────────
-def test_heresphere_auth_rejects_bad_token(client, mocked_responses):
+def test_heresphere_auth_rejects_bad_token(client):
     """HereSphere API rejects requests with wrong auth token."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
     client.application.config['HERESPHERE_AUTH_TOKEN'] = 'secret-token'
     response = client.post(
         "/heresphere",
@@ -373,30 +366,19 @@ def test_heresphere_auth_rejects_bad_token(client, mocked_responses):
     assert response.status_code == 401
 
 
-def test_heresphere_auth_allows_correct_token(client, mocked_responses):
+def test_heresphere_auth_allows_correct_token(client, rd_service):
     """HereSphere API allows requests with correct auth token."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
     client.application.config['HERESPHERE_AUTH_TOKEN'] = 'secret-token'
-    with patch('app.services.real_debrid.RealDebridService.get_all_torrents') as mock_torrents:
-        mock_torrents.return_value = []
-        response = client.post(
-            "/heresphere",
-            headers={"Authorization": "Bearer secret-token"},
-        )
-        assert response.status_code == 200
+    rd_service.get_all_torrents.return_value = []
+    response = client.post(
+        "/heresphere",
+        headers={"Authorization": "Bearer secret-token"},
+    )
+    assert response.status_code == 200
 
 
-def test_deovr_auth_rejects_bad_token(client, mocked_responses):
+def test_deovr_auth_rejects_bad_token(client):
     """DeoVR API rejects requests with wrong auth token."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
     client.application.config['HERESPHERE_AUTH_TOKEN'] = 'secret-token'
     response = client.post(
         "/deovr",
@@ -405,14 +387,38 @@ def test_deovr_auth_rejects_bad_token(client, mocked_responses):
     assert response.status_code == 401
 
 
+# ── JSON provider test ─────────────────────────────────────────
+def test_json_provider_matches_flask_default(app):
+    """The orjson provider encodes like Flask's default, indented or compact."""
+    from datetime import datetime, timezone
+    from flask.json.provider import DefaultJSONProvider
+    pytest.importorskip("orjson")
+    obj = {"b": [1, 2.5, None], "a": "caf\u00e9", "when": datetime(2026, 1, 1, tzinfo=timezone.utc)}
+    default = DefaultJSONProvider(app)
+    for kwargs in ({}, {"indent": 2}, {"separators": (",", ":")}):
+        assert default.loads(app.json.dumps(obj, **kwargs)) == default.loads(default.dumps(obj, **kwargs))
+    # Options orjson cannot express fall back to the stdlib encoder intact
+    loose = {"separators": (", ", " = "), "sort_keys": False}
+    assert app.json.dumps({"a": [1, 2]}, **loose) == default.dumps({"a": [1, 2]}, **loose)
+    assert app.json.dumps(obj).index('"a"') < app.json.dumps(obj).index('"b"')
+
+    from app.services.vr_helper import DeoVRVideo
+    video = DeoVRVideo(title="t", videoLength=0, thumbnailUrl="u", video_url="v")
+    compact = {"separators": (",", ":")}
+    assert app.json.dumps([video], **compact) == default.dumps([video], **compact)
+
+
+def test_json_dataclass_fields_are_sorted():
+    """orjson emits dataclass fields in declaration order, so it must be sorted."""
+    import dataclasses
+    from app.services.vr_helper import DeoVRVideo
+    names = [f.name for f in dataclasses.fields(DeoVRVideo)]
+    assert names == sorted(names)
+
+
 # ── Security headers test ──────────────────────────────────────
-def test_responses_include_security_headers(client, mocked_responses):
+def test_responses_include_security_headers(client):
     """All responses include CSP and X-Content-Type-Options headers."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
     response = client.get("/health")
     assert response.headers.get('X-Content-Type-Options') == 'nosniff'
     assert response.headers.get('X-Frame-Options') == 'SAMEORIGIN'
@@ -420,13 +426,8 @@ def test_responses_include_security_headers(client, mocked_responses):
 
 
 # ── Error path tests ───────────────────────────────────────────
-def test_unrestrict_link_rejects_missing_link(client, mocked_responses):
+def test_unrestrict_link_rejects_missing_link(client):
     """POST /torrent/unrestrict_link returns 400 when link is missing."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
     response = client.post(
         "/torrent/unrestrict_link",
         json={"not_link": "value"},
@@ -435,134 +436,70 @@ def test_unrestrict_link_rejects_missing_link(client, mocked_responses):
     assert response.status_code == 400
 
 
-def test_delete_torrent_handles_api_error(client, mocked_responses):
+def test_delete_torrent_handles_api_error(client, rd_service):
     """DELETE /torrent/delete_torrent returns 500 on RD API error."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
-    with patch('app.services.real_debrid.RealDebridService.delete_torrent') as mock_del:
-        from app.services.real_debrid import RealDebridError
-        mock_del.side_effect = RealDebridError("API error")
-        response = client.delete("/torrent/delete_torrent/abc123")
-        assert response.status_code == 500
+    rd_service.delete_torrent.side_effect = RealDebridError("API error")
+    response = client.delete("/torrent/delete_torrent/abc123")
+    assert response.status_code == 500
 
 
 # ── Torrent ID validation tests ──────────────────────────────
 
-def test_delete_torrent_rejects_invalid_id(client, mocked_responses):
+def test_delete_torrent_rejects_invalid_id(client, json_body):
     """DELETE /torrent/delete_torrent/<id> rejects IDs with special chars."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
     response = client.delete("/torrent/delete_torrent/bad_id_here")
     assert response.status_code == 400
-    assert "Invalid torrent ID" in response.get_json()["error"]
+    body = json_body(response)
+    assert "Invalid torrent ID" in body["error"]
 
 
-def test_get_torrent_details_rejects_invalid_id(client, mocked_responses):
+def test_get_torrent_details_rejects_invalid_id(client):
     """GET /torrent/torrents/<id> rejects IDs with special chars."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
     response = client.get("/torrent/torrents/bad_id_here")
     assert response.status_code == 400
 
 
 # ── Partial bulk delete (207) test ────────────────────────────
 
-def test_bulk_delete_partial_success(client, mocked_responses):
+def test_bulk_delete_partial_success(client, rd_service, json_body):
     """POST /torrent/delete_torrents returns 207 on partial failure."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
-    from app.services.real_debrid import RealDebridError
-
     call_count = {"n": 0}
 
-    def side_effect(tid):
+    def delete_torrent(torrent_id):
         call_count["n"] += 1
         if call_count["n"] == 2:
             raise RealDebridError("API error")
         return True
 
-    with patch('app.services.real_debrid.RealDebridService.delete_torrent') as mock_del:
-        mock_del.side_effect = side_effect
-        response = client.post(
-            "/torrent/delete_torrents",
-            json={"torrentIds": ["abc123", "def456"]},
-            content_type="application/json",
-        )
-        assert response.status_code == 207
-        body = response.get_json()
-        assert body["status"] == "partial_success"
-        assert len(body["results"]["deleted"]) == 1
-        assert len(body["results"]["failed"]) == 1
+    rd_service.delete_torrent.side_effect = delete_torrent
+    response = client.post(
+        "/torrent/delete_torrents",
+        json={"torrentIds": ["abc123", "def456"]},
+        content_type="application/json",
+    )
+    assert response.status_code == 207
+    body = json_body(response)
+    assert body["status"] == "partial_success"
+    assert len(body["results"]["deleted"]) == 1
+    assert len(body["results"]["failed"]) == 1
 
 
 # ── Pagination edge case tests ────────────────────────────────
 
-def test_rd_manager_clamps_high_page(client, mocked_responses):
+def test_rd_manager_clamps_high_page(client, rd_service):
     """GET /torrent/rd_manager?page=999 clamps to last page."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
-    with patch('app.services.real_debrid.RealDebridService.get_all_torrents') as mock_torrents:
-        mock_torrents.return_value = [
-            {"id": f"t{i}", "filename": f"file{i}.mkv", "status": "downloaded", "progress": 100}
-            for i in range(3)
-        ]
-        response = client.get("/torrent/rd_manager?page=999")
-        assert response.status_code == 200
+    torrents = [
+        {"id": f"t{i}", "filename": f"file{i}.mkv", "status": "downloaded", "progress": 100}
+        for i in range(3)
+    ]
+    rd_service.get_all_torrents.return_value = torrents
+    response = client.get("/torrent/rd_manager?page=999")
+    assert response.status_code == 200
 
 
-def test_rd_manager_negative_page_defaults_to_one(client, mocked_responses):
+def test_rd_manager_negative_page_defaults_to_one(client, rd_service):
     """GET /torrent/rd_manager?page=-5 defaults to page 1."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
-    with patch('app.services.real_debrid.RealDebridService.get_all_torrents') as mock_torrents:
-        mock_torrents.return_value = []
-        response = client.get("/torrent/rd_manager?page=-5")
-        assert response.status_code == 200
-
-
-# ── Network failure / timeout tests ──────────────────────────
-
-def test_real_debrid_connection_error(app, mocked_responses):
-    """RealDebridService raises RealDebridError on connection failure."""
-    import requests as req
-    with app.app_context():
-        from app.services.real_debrid import RealDebridService, RealDebridError
-        service = RealDebridService(api_key="test_rd_key")
-        mocked_responses.get(
-            "https://api.real-debrid.com/rest/1.0/user",
-            body=req.ConnectionError("Connection refused"),
-        )
-        with pytest.raises(RealDebridError):
-            service.get_account_info()
-
-
-def test_real_debrid_timeout_error(app, mocked_responses):
-    """RealDebridService raises RealDebridError on timeout."""
-    import requests as req
-    with app.app_context():
-        from app.services.real_debrid import RealDebridService, RealDebridError
-        service = RealDebridService(api_key="test_rd_key")
-        mocked_responses.get(
-            "https://api.real-debrid.com/rest/1.0/user",
-            body=req.Timeout("Timed out"),
-        )
-        with pytest.raises(RealDebridError):
-            service.get_account_info()
+    rd_service.get_all_torrents.return_value = []
+    response = client.get("/torrent/rd_manager?page=-5")
+    assert response.status_code == 200
+
@@ -1,230 +1,175 @@
 import pytest
 import json
+import re
 import threading
-from unittest.mock import patch
-
+from flask import request
+from werkzeug.exceptions import BadRequest
+
+from app.routes.search import _active_searches, _validate_search
+
+_EMPTY_QUERY_ERROR = b"Search query cannot be empty"
+_NO_RESULTS = b"No Results Found"
+
+# Payload of each SSE ``data:`` line, matched on the raw response bytes
+_SSE_DATA_RE = re.compile(rb"^data: (.*)$", re.MULTILINE)
+
+# Reused by the cancel test; cleared before each use
+_TEST_CANCEL_EVENT = threading.Event()
+
+# Pipeline results returned by the mocked download link service. The index
+# route only reads them, so every test can share the same objects.
+_EMPTY_PIPELINE_RESULT = {"data": [], "timers": []}
+_PIPELINE_MOCK_RESULT = {
+    "data": [
+        {
+            "Torrent Name": "Test.Movie.1080p",
+            "Categories": ["Movies"],
+            "Files": [
+                {
+                    "File Name": "Test.Movie.1080p.mkv",
+                    "File Size": "1.00 GB",
+                    "Download Link": "https://download.real-debrid.com/d/abc123/Test.Movie.1080p.mkv"
+                }
+            ]
+        }
+    ],
+    "timers": [
+        {"script": "Jackett Search", "time": 1.5},
+        {"script": "RD Download Links", "time": 3.2}
+    ]
+}
+
+
+@pytest.mark.integration
+def test_search_post_validates(client):
+    """Test that empty queries return 400 Bad Request through the full stack."""
+    response = client.post("/", data={"query": "", "limit": "10"})
+    assert response.status_code == 400
+    assert _EMPTY_QUERY_ERROR in response.data
 
-def test_index_page_loads(client, mocked_responses):
-    """Test that the index page loads successfully on GET."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser", "premium": 100},
-        status=200
-    )
 
-    response = client.get("/")
-    assert response.status_code == 200
-    assert b"Debrid Scout" in response.data
+@pytest.mark.parametrize("form,message", [
+    ({"query": "", "limit": "10"}, "cannot be empty"),
+    ({"query": "   ", "limit": "10"}, "cannot be empty"),
+    ({"query": "test", "limit": "abc"}, "positive integer"),
+    ({"query": "test", "limit": "0"}, "positive integer"),
+])
+def test_validate_search_rejects_bad_input(app, form, message):
+    """_validate_search raises BadRequest for empty queries and bad limits."""
+    with app.test_request_context("/", method="POST", data=form):
+        with pytest.raises(BadRequest, match=message):
+            _validate_search(request.form)
 
 
-def test_search_post_validates(client, mocked_responses):
-    """Test that empty queries return 400 Bad Request."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200
-    )
-
-    response = client.post("/", data={"query": "", "limit": "10"})
-    assert response.status_code == 400
-    assert b"Search query cannot be empty" in response.data
+def test_validate_search_returns_query_and_limit(app):
+    """_validate_search strips the query and converts the limit to int."""
+    with app.test_request_context("/", method="POST", data={"query": " test ", "limit": "5"}):
+        assert _validate_search(request.form) == ("test", 5)
 
 
-def test_search_post_invalid_limit(client, mocked_responses):
-    """Test that invalid limit returns 400 Bad Request."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200
-    )
+def test_jackett_search_pipeline(client, rd_link_service):
+    """Test the full search pipeline end-to-end with mocked service layer."""
+    rd_link_service.search_and_get_links.return_value = _PIPELINE_MOCK_RESULT
 
-    response = client.post("/", data={"query": "test", "limit": "abc"})
-    assert response.status_code == 400
-    assert b"Limit must be a positive integer" in response.data
+    response = client.post("/", data={"query": "Test Movie", "limit": "10"})
+    assert response.status_code == 200
+    html = response.data
+    assert b"Test Movie 1080p" in html  # simplify_filename replaces dots with spaces
+    assert b"1.00 GB" in html
 
 
-def test_jackett_search_pipeline(client, mocked_responses):
-    """Test the full search pipeline end-to-end with mocked service layer."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200
-    )
-
-    # Mock the download link service to return a complete result
-    mock_result = {
-        "data": [
-            {
-                "Torrent Name": "Test.Movie.1080p",
-                "Categories": ["Movies"],
-                "Files": [
-                    {
-                        "File Name": "Test.Movie.1080p.mkv",
-                        "File Size": "1.00 GB",
-                        "Download Link": "https://download.real-debrid.com/d/abc123/Test.Movie.1080p.mkv"
-                    }
-                ]
-            }
-        ],
-        "timers": [
-            {"script": "Jackett Search", "time": 1.5},
-            {"script": "RD Download Links", "time": 3.2}
-        ]
-    }
-
-    with patch('app.routes.search.RDDownloadLinkService') as MockService:
-        MockService.return_value.search_and_get_links.return_value = mock_result
-
-        response = client.post("/", data={"query": "Test Movie", "limit": "10"})
-        assert response.status_code == 200
-        assert b"Test Movie 1080p" in response.data  # simplify_filename replaces dots with spaces
-        assert b"1.00 GB" in response.data
-
-
-def test_search_no_results(client, mocked_responses):
+def test_search_no_results(client, rd_link_service):
     """Test that 'No Results Found' is shown when pipeline returns empty."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200
-    )
-
-    with patch('app.routes.search.RDDownloadLinkService') as MockService:
-        MockService.return_value.search_and_get_links.return_value = {"data": [], "timers": []}
+    rd_link_service.search_and_get_links.return_value = _EMPTY_PIPELINE_RESULT
 
-        response = client.post("/", data={"query": "nonexistent", "limit": "10"})
-        assert response.status_code == 200
-        assert b"No Results Found" in response.data
+    response = client.post("/", data={"query": "nonexistent", "limit": "10"})
+    assert response.status_code == 200
+    assert _NO_RESULTS in response.data
 
 
-def test_cancel_search_not_found(client, mocked_responses):
+def test_cancel_search_not_found(client, json_body):
     """Test that cancelling a non-existent search returns 404."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200
-    )
-
     response = client.post("/cancel", json={"search_id": "nonexistent_id"})
     assert response.status_code == 404
-    assert response.json["status"] == "not_found"
+    body = json_body(response)
+    assert body["status"] == "not_found"
 
 
-def test_cancel_search_active(client, mocked_responses):
+def test_cancel_search_active(client, worker_id, json_body):
     """Test that cancelling an active search sets the cancel event."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200
-    )
-
-    # Manually inject a cancel event into _active_searches
-    from app.routes.search import _active_searches
-    cancel_event = threading.Event()
-    _active_searches["test_search_123"] = cancel_event
-
-    try:
-        response = client.post("/cancel", json={"search_id": "test_search_123"})
-        assert response.status_code == 200
-        assert response.json["status"] == "cancelled"
-        assert cancel_event.is_set()
-    finally:
-        _active_searches.pop("test_search_123", None)
-
-
-def test_cancel_search_no_json(client, mocked_responses):
-    """Test that cancel without JSON body returns 400."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200
-    )
+    # Manually inject a cancel event into _active_searches; _reset_state
+    # drops it again before the next test
+    search_id = f"{worker_id}_test_search_123"
+    _TEST_CANCEL_EVENT.clear()
+    _active_searches[search_id] = _TEST_CANCEL_EVENT
+
+    response = client.post("/cancel", json={"search_id": search_id})
+    assert response.status_code == 200
+    body = json_body(response)
+    assert body["status"] == "cancelled"
+    assert _TEST_CANCEL_EVENT.is_set()
 
+
+def test_cancel_search_no_json(client):
+    """Test that cancel without JSON body returns 400."""
     response = client.post("/cancel", data="not json")
     assert response.status_code == 400
 
 
 # ── SSE Streaming Endpoint Tests ─────────────────────────────
 
-def test_stream_search_no_json(client, mocked_responses):
+def test_stream_search_no_json(client, json_body):
     """Test that stream endpoint rejects non-JSON requests."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
     response = client.post("/stream", data="not json")
     assert response.status_code == 400
-    assert response.json["status"] == "error"
+    body = json_body(response)
+    assert body["status"] == "error"
 
 
-def test_stream_search_empty_query(client, mocked_responses):
+def test_stream_search_empty_query(client, json_body):
     """Test that stream endpoint rejects empty query."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
     response = client.post("/stream", json={"query": "", "limit": 10})
     assert response.status_code == 400
-    assert "Query is required" in response.json["error"]
+    body = json_body(response)
+    assert "Query is required" in body["error"]
 
 
-def test_stream_search_invalid_limit(client, mocked_responses):
+def test_stream_search_invalid_limit(client, json_body):
     """Test that stream endpoint rejects invalid limit."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
     response = client.post("/stream", json={"query": "test", "limit": "abc"})
     assert response.status_code == 400
-    assert "positive integer" in response.json["error"]
+    body = json_body(response)
+    assert "positive integer" in body["error"]
 
 
-def test_stream_search_negative_limit(client, mocked_responses):
+def test_stream_search_negative_limit(client):
     """Test that stream endpoint rejects negative limit."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
     response = client.post("/stream", json={"query": "test", "limit": -5})
     assert response.status_code == 400
 
 
-def test_stream_search_returns_event_stream(client, mocked_responses):
+def test_stream_search_returns_event_stream(client, rd_link_service):
     """Test that valid stream request returns text/event-stream."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json={"id": 12345, "username": "testuser"},
-        status=200,
-    )
-
-    with patch('app.routes.search.RDDownloadLinkService') as MockService:
-        # Simulate a generator that yields a done event
-        def mock_stream(query, limit, cancel_event=None):
-            yield {"type": "progress", "stage": "Searching...", "detail": "", "current": 0, "total": 0}
-            yield {"type": "done", "total": 0, "elapsed": "0.50"}
-
-        MockService.return_value.search_and_get_links_stream = mock_stream
-
-        response = client.post("/stream", json={"query": "test movie", "limit": 10})
-        assert response.status_code == 200
-        assert response.content_type.startswith("text/event-stream")
-
-        # Parse the SSE events from the response
-        data = response.get_data(as_text=True)
-        events = [line for line in data.split("\n") if line.startswith("data: ")]
-
-        # Should have at least: search_id, progress, done
-        assert len(events) >= 2
-
-        # First event should be the search_id
-        first = json.loads(events[0].replace("data: ", ""))
-        assert first["type"] == "search_id"
-
-        # Last event should be done
-        last = json.loads(events[-1].replace("data: ", ""))
-        assert last["type"] == "done"
-        assert last["total"] == 0
+    # Simulate a generator that yields a done event
+    def mock_stream(query, limit, cancel_event=None):
+        yield {"type": "progress", "stage": "Searching...", "detail": "", "current": 0, "total": 0}
+        yield {"type": "done", "total": 0, "elapsed": "0.50"}
+
+    rd_link_service.search_and_get_links_stream = mock_stream
+
+    response = client.post("/stream", json={"query": "test movie", "limit": 10})
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/event-stream")
+
+    # Pull the JSON payloads straight out of the body bytes
+    events = [json.loads(m.group(1)) for m in _SSE_DATA_RE.finditer(response.get_data())]
+
+    # Should have at least: search_id, progress, done
+    assert len(events) >= 2
+
+    # First event should be the search_id
+    assert events[0]["type"] == "search_id"
+
+    # Last event should be done
+    assert events[-1]["type"] == "done"
+    assert events[-1]["total"] == 0
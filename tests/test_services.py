@@ -1,318 +1,420 @@
+import itertools
+import json
 import pytest
+import requests
 import responses
-from app.services.real_debrid import RealDebridService, RealDebridError
-from app.services.jackett_search import JackettSearchService, JackettSearchError
+import threading
+from types import SimpleNamespace
+from app.services.real_debrid import RealDebridError
 from app.services.file_helper import FileHelper
 
+_JACKETT_XML_ONE_ITEM = b'''<?xml version="1.0" encoding="UTF-8"?>
+<rss version="1.0" xmlns:torznab="http://torznab.com/schemas/2015/feed">
+<channel>
+    <item>
+        <title>Test Movie 1080p</title>
+        <link>magnet:?xt=urn:btih:1234567890abcdef1234567890abcdef12345678</link>
+        <size>1048576000</size>
+        <torznab:attr name="seeders" value="100" />
+        <torznab:attr name="peers" value="20" />
+        <torznab:attr name="category" value="2000" />
+    </item>
+</channel>
+</rss>
+'''
+_JACKETT_XML_EMPTY = b'<?xml version="1.0" encoding="UTF-8"?><rss version="1.0"><channel></channel></rss>'
+
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _app_ctx(app):
+    """Push one app context for every test in this module.
+
+    Nothing here goes through the test client, so sharing the context (and
+    its ``g``) across tests is safe. Route tests keep a fresh context per
+    request.
+    """
+    with app.app_context():
+        yield
+
 
 # ── FileHelper tests ──────────────────────────────────────────
 
 class TestFileHelperFormatFileSize:
     """Tests for FileHelper.format_file_size()."""
 
-    def test_zero_bytes(self):
-        assert FileHelper.format_file_size(0) == "0.00 B"
-
-    def test_bytes(self):
-        assert FileHelper.format_file_size(512) == "512.00 B"
-
-    def test_kilobytes(self):
-        assert FileHelper.format_file_size(1024) == "1.00 KB"
-
-    def test_megabytes(self):
-        assert FileHelper.format_file_size(1048576) == "1.00 MB"
-
-    def test_gigabytes(self):
-        assert FileHelper.format_file_size(4831838208) == "4.50 GB"
-
-    def test_terabytes(self):
-        assert FileHelper.format_file_size(1099511627776) == "1.00 TB"
-
-    def test_negative_returns_zero(self):
-        assert FileHelper.format_file_size(-100) == "0.00 B"
-
-    def test_non_numeric_returns_zero(self):
-        assert FileHelper.format_file_size("abc") == "0.00 B"
-
-    def test_none_returns_zero(self):
-        assert FileHelper.format_file_size(None) == "0.00 B"
+    @pytest.mark.parametrize("value,expected", [
+        (0, "0.00 B"),
+        (512, "512.00 B"),
+        (1024, "1.00 KB"),
+        (1048576, "1.00 MB"),
+        (4831838208, "4.50 GB"),
+        (1099511627776, "1.00 TB"),
+        (-100, "0.00 B"),
+        ("abc", "0.00 B"),
+        (None, "0.00 B"),
+    ], ids=[
+        "zero_bytes", "bytes", "kilobytes", "megabytes", "gigabytes", "terabytes",
+        "negative_returns_zero", "non_numeric_returns_zero", "none_returns_zero",
+    ])
+    def test_format_file_size(self, value, expected):
+        assert FileHelper.format_file_size(value) == expected
 
 
 class TestFileHelperSimplifyFilename:
     """Tests for FileHelper.simplify_filename()."""
 
-    def test_dots_replaced_with_spaces(self):
-        assert FileHelper.simplify_filename("Test.Movie.2024.mkv") == "Test Movie 2024.mkv"
-
-    def test_numeric_extension_preserved(self):
-        # rsplit('.', 1) treats the last segment as an extension
-        assert FileHelper.simplify_filename("Test.Movie.2024") == "Test Movie.2024"
-
-    def test_no_dots(self):
-        assert FileHelper.simplify_filename("TestMovie") == "TestMovie"
-
-    def test_single_extension_only(self):
-        assert FileHelper.simplify_filename("movie.mp4") == "movie.mp4"
-
-    def test_preserves_last_extension(self):
-        assert FileHelper.simplify_filename("My.Great.Video.File.avi") == "My Great Video File.avi"
+    # rsplit('.', 1) treats the last segment as an extension
+    @pytest.mark.parametrize("filename,expected", [
+        ("Test.Movie.2024.mkv", "Test Movie 2024.mkv"),
+        ("Test.Movie.2024", "Test Movie.2024"),
+        ("TestMovie", "TestMovie"),
+        ("movie.mp4", "movie.mp4"),
+        ("My.Great.Video.File.avi", "My Great Video File.avi"),
+    ], ids=[
+        "dots_replaced_with_spaces", "numeric_extension_preserved", "no_dots",
+        "single_extension_only", "preserves_last_extension",
+    ])
+    def test_simplify_filename(self, filename, expected):
+        assert FileHelper.simplify_filename(filename) == expected
 
 
 class TestFileHelperIsVideoFile:
     """Tests for FileHelper.is_video_file() — requires app context for static file loading."""
 
-    def test_video_file_recognized(self, app):
-        with app.app_context():
-            assert FileHelper.is_video_file("movie.mkv") is True
+    def test_video_file_recognized(self):
+        assert FileHelper.is_video_file("movie.mkv") is True
 
-    def test_non_video_file_rejected(self, app):
-        with app.app_context():
-            assert FileHelper.is_video_file("readme.txt") is False
+    def test_non_video_file_rejected(self):
+        assert FileHelper.is_video_file("readme.txt") is False
 
-    def test_mp4_recognized(self, app):
-        with app.app_context():
-            assert FileHelper.is_video_file("clip.mp4") is True
+    def test_mp4_recognized(self):
+        assert FileHelper.is_video_file("clip.mp4") is True
 
-    def test_case_insensitive(self, app):
-        with app.app_context():
-            assert FileHelper.is_video_file("MOVIE.MKV") is True
+    def test_case_insensitive(self):
+        assert FileHelper.is_video_file("MOVIE.MKV") is True
 
 
 class TestFileHelperLoadVideoExtensions:
     """Tests for FileHelper.load_video_extensions()."""
 
-    def test_returns_list(self, app):
-        with app.app_context():
-            extensions = FileHelper.load_video_extensions()
-            assert isinstance(extensions, list)
-            assert len(extensions) > 0
-            assert ".mkv" in extensions or ".mp4" in extensions
+    def test_returns_frozenset(self):
+        extensions = FileHelper.load_video_extensions()
+        assert isinstance(extensions, frozenset)
+        assert len(extensions) > 0
+        assert ".mkv" in extensions or ".mp4" in extensions
 
-    def test_load_category_mapping(self, app):
-        with app.app_context():
-            mapping = FileHelper.load_category_mapping()
-            assert isinstance(mapping, dict)
-            assert len(mapping) > 0
+    def test_load_category_mapping(self):
+        mapping = FileHelper.load_category_mapping()
+        assert isinstance(mapping, dict)
+        assert len(mapping) > 0
 
 
 # ── RealDebridService tests ───────────────────────────────────
 
-def test_real_debrid_get_account_info(app, mocked_responses):
-    with app.app_context():
-        service = RealDebridService(api_key="test_rd_key")
-
-        # Test successful response
-        mocked_responses.get(
-            "https://api.real-debrid.com/rest/1.0/user",
-            json={"id": 12345, "username": "testuser", "expiration": "2030-01-01T00:00:00.000Z"},
-            status=200
-        )
-        info = service.get_account_info()
-        assert info["username"] == "testuser"
-        assert info["formatted_expiration"] == "January 01, 2030, 00:00:00 UTC"
-
-        # Test failure response
-        mocked_responses.replace(
-            responses.GET,
-            "https://api.real-debrid.com/rest/1.0/user",
-            json={"error": "bad_token"},
-            status=401
-        )
-        with pytest.raises(RealDebridError):
-            service.get_account_info()
-
-def test_real_debrid_add_magnet(app, mocked_responses):
-    with app.app_context():
-        service = RealDebridService(api_key="test_rd_key")
-
-        mocked_responses.post(
-            "https://api.real-debrid.com/rest/1.0/torrents/addMagnet",
-            json={"id": "XYZ123"},
-            status=201
-        )
-
-        torrent_id = service.add_magnet("magnet:?xt=urn:btih:fake")
-        assert torrent_id == "XYZ123"
-
-
-def test_real_debrid_delete_torrent(app, mocked_responses):
-    """Test RealDebridService.delete_torrent() success and failure."""
-    with app.app_context():
-        service = RealDebridService(api_key="test_rd_key")
-
-        mocked_responses.delete(
-            "https://api.real-debrid.com/rest/1.0/torrents/delete/abc123",
-            status=204,
-        )
-        assert service.delete_torrent("abc123") is True
-
-        # Test failure
-        mocked_responses.delete(
-            "https://api.real-debrid.com/rest/1.0/torrents/delete/bad_id",
-            status=404,
-            json={"error": "not found"},
-        )
-        with pytest.raises(RealDebridError):
-            service.delete_torrent("bad_id")
-
-
-def test_real_debrid_unrestrict_link(app, mocked_responses):
-    """Test RealDebridService.unrestrict_link()."""
-    with app.app_context():
-        service = RealDebridService(api_key="test_rd_key")
-
-        mocked_responses.post(
-            "https://api.real-debrid.com/rest/1.0/unrestrict/link",
-            json={"download": "https://download.rd.com/d/xyz/movie.mkv"},
-            status=200,
-        )
-        url = service.unrestrict_link("https://example.com/restricted")
-        assert url == "https://download.rd.com/d/xyz/movie.mkv"
-
-
-def test_real_debrid_get_torrent_info(app, mocked_responses):
-    """Test RealDebridService.get_torrent_info()."""
-    with app.app_context():
-        service = RealDebridService(api_key="test_rd_key")
-
-        mocked_responses.get(
-            "https://api.real-debrid.com/rest/1.0/torrents/info/tid123",
-            json={
-                "id": "tid123",
-                "filename": "Great.Movie.mkv",
-                "status": "downloaded",
-                "files": [{"id": 1, "path": "/Great.Movie.mkv", "bytes": 5000000000, "selected": 1}],
-                "links": ["https://rd.link/1"],
-            },
-            status=200,
-        )
-        info = service.get_torrent_info("tid123")
-        assert info["filename"] == "Great.Movie.mkv"
-        assert len(info["files"]) == 1
-
-
-def test_real_debrid_get_all_torrents(app, mocked_responses):
+@pytest.fixture(scope="module")
+def real_rd_service():
+    """One real RealDebridService shared by the RD tests in this module."""
+    from app.services.real_debrid import RealDebridService
+    return RealDebridService(api_key="test_rd_key")
+
+
+@pytest.fixture(scope="module")
+def jackett_service():
+    """One real JackettSearchService shared by the Jackett tests in this module."""
+    from app.services.jackett_search import JackettSearchService
+    return JackettSearchService(api_key="test_jackett", base_url="http://localhost:9117")
+
+
+def test_real_debrid_get_account_info(real_rd_service, mocked_responses):
+    # One registration: the first call succeeds, every later call is rejected
+    calls = itertools.count()
+
+    def user_callback(request):
+        if next(calls) == 0:
+            body = {"id": 12345, "username": "testuser", "expiration": "2030-01-01T00:00:00.000Z"}
+            return 200, {}, json.dumps(body)
+        return 401, {}, json.dumps({"error": "bad_token"})
+
+    mocked_responses.add_callback(
+        responses.GET,
+        "https://api.real-debrid.com/rest/1.0/user",
+        callback=user_callback,
+        content_type="application/json",
+    )
+
+    # Test successful response
+    info = real_rd_service.get_account_info()
+    assert info["username"] == "testuser"
+    assert info["formatted_expiration"] == "January 01, 2030, 00:00:00 UTC"
+
+    # Test failure response
+    with pytest.raises(RealDebridError):
+        real_rd_service.get_account_info()
+
+
+@pytest.mark.parametrize("exc", [
+    requests.ConnectionError("Connection refused"),
+    requests.Timeout("Timed out"),
+], ids=["connection_error", "timeout"])
+def test_real_debrid_network_failure(real_rd_service, mocked_responses, exc):
+    """RealDebridService raises RealDebridError on connection failure or timeout."""
+    mocked_responses.get("https://api.real-debrid.com/rest/1.0/user", body=exc)
+    with pytest.raises(RealDebridError):
+        real_rd_service.get_account_info()
+
+
+_RD_API = "https://api.real-debrid.com/rest/1.0"
+
+_TORRENT_INFO = {
+    "id": "tid123",
+    "filename": "Great.Movie.mkv",
+    "status": "downloaded",
+    "files": [{"id": 1, "path": "/Great.Movie.mkv", "bytes": 5000000000, "selected": 1}],
+    "links": ["https://rd.link/1"],
+}
+
+
+@pytest.mark.parametrize("method_name,args,http_method,path,status,body,expected", [
+    ("add_magnet", ("magnet:?xt=urn:btih:fake",),
+     "POST", "/torrents/addMagnet", 201, {"id": "XYZ123"}, "XYZ123"),
+    ("delete_torrent", ("abc123",),
+     "DELETE", "/torrents/delete/abc123", 204, None, True),
+    ("unrestrict_link", ("https://example.com/restricted",),
+     "POST", "/unrestrict/link", 200, {"download": "https://download.rd.com/d/xyz/movie.mkv"},
+     "https://download.rd.com/d/xyz/movie.mkv"),
+    ("get_torrent_info", ("tid123",),
+     "GET", "/torrents/info/tid123", 200, _TORRENT_INFO, _TORRENT_INFO),
+    ("select_files", ("tid123",),
+     "POST", "/torrents/selectFiles/tid123", 204, None, True),
+], ids=["add_magnet", "delete_torrent", "unrestrict_link", "get_torrent_info", "select_files"])
+def test_real_debrid_method(real_rd_service, mocked_responses, method_name, args,
+                            http_method, path, status, body, expected):
+    """Each single-endpoint RealDebridService method maps its response to a return value."""
+    mocked_responses.add(http_method, _RD_API + path, json=body, status=status)
+    assert getattr(real_rd_service, method_name)(*args) == expected
+
+
+def test_real_debrid_delete_torrent_not_found(real_rd_service, mocked_responses):
+    """delete_torrent() raises RealDebridError on a 404."""
+    mocked_responses.delete(
+        f"{_RD_API}/torrents/delete/bad_id",
+        status=404,
+        json={"error": "not found"},
+    )
+    with pytest.raises(RealDebridError):
+        real_rd_service.delete_torrent("bad_id")
+
+
+def test_real_debrid_get_all_torrents(real_rd_service, mocked_responses):
     """Test RealDebridService.get_all_torrents() with pagination."""
-    with app.app_context():
-        service = RealDebridService(api_key="test_rd_key")
-
-        mocked_responses.get(
-            "https://api.real-debrid.com/rest/1.0/torrents?page=1",
-            json=[{"id": "t1"}, {"id": "t2"}],
-            status=200,
-        )
-        mocked_responses.get(
-            "https://api.real-debrid.com/rest/1.0/torrents?page=2",
-            json=[],
-            status=200,
-        )
-        torrents = service.get_all_torrents()
-        assert len(torrents) == 2
-        assert torrents[0]["id"] == "t1"
-
-
-def test_real_debrid_missing_api_key(app):
+    mocked_responses.get(
+        "https://api.real-debrid.com/rest/1.0/torrents?page=1",
+        json=[{"id": "t1"}, {"id": "t2"}],
+        status=200,
+    )
+    mocked_responses.get(
+        "https://api.real-debrid.com/rest/1.0/torrents?page=2",
+        json=[],
+        status=200,
+    )
+    torrents = real_rd_service.get_all_torrents()
+    assert len(torrents) == 2
+    assert torrents[0]["id"] == "t1"
+
+
+def test_real_debrid_missing_api_key(app, monkeypatch):
     """Test that missing API key raises RealDebridError."""
-    with app.app_context():
-        app.config['REAL_DEBRID_API_KEY'] = None
-        with pytest.raises(RealDebridError, match="missing"):
-            RealDebridService(api_key=None)
-
+    from app.services.real_debrid import RealDebridService
+    monkeypatch.setitem(app.config, 'REAL_DEBRID_API_KEY', None)
+    with pytest.raises(RealDebridError, match="missing"):
+        RealDebridService(api_key=None)
+
+
+def test_real_debrid_session_shared_per_api_key():
+    """Services for one API key reuse a pooled session; other keys get their own."""
+    from app.services.real_debrid import RealDebridService
+    a = RealDebridService(api_key="key_a")
+    assert RealDebridService(api_key="key_a")._session is a._session
+    assert RealDebridService(api_key="key_b")._session is not a._session
+    for url in ("https://api.real-debrid.com", "http://api.real-debrid.com"):
+        assert a._session.get_adapter(url)._pool_maxsize == 16
+
+
+def test_real_debrid_sessions_capped():
+    """Only the most recently used API keys keep a pooled session."""
+    from app.services import real_debrid
+    for i in range(real_debrid._MAX_SESSIONS + 3):
+        real_debrid.RealDebridService(api_key=f"cap_{i}")
+    assert len(real_debrid._sessions) == real_debrid._MAX_SESSIONS
+    assert f"cap_{real_debrid._MAX_SESSIONS + 2}" in real_debrid._sessions
+    assert "cap_0" not in real_debrid._sessions
+
+
+def test_token_bucket_blocks_until_refill(monkeypatch):
+    """The 251st call in the same instant waits one refill interval."""
+    from app.services import real_debrid
+    now = [100.0]
+    sleeps = []
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    # Swap the module's time reference only; the real time module is untouched
+    monkeypatch.setattr(real_debrid, "time", SimpleNamespace(monotonic=lambda: now[0], sleep=fake_sleep))
+    bucket = real_debrid._TokenBucket(250, 250 / 60)
+
+    for _ in range(250):
+        bucket.acquire()
+    assert sleeps == []
+
+    bucket.acquire()
+    assert sleeps == [pytest.approx(60 / 250)]
+
+
+def test_token_bucket_shared_per_api_key():
+    """Services for one API key draw from one bucket, whatever instance built them."""
+    from app.services.real_debrid import RealDebridService
+    a = RealDebridService(api_key="bucket_a")
+    assert RealDebridService(api_key="bucket_a")._bucket is a._bucket
+    assert RealDebridService(api_key="bucket_b")._bucket is not a._bucket
+
+
+# ── rd_cache tests ────────────────────────────────────────────
+
+def test_all_torrents_cached_within_ttl(real_rd_service, mocked_responses):
+    """A second lookup inside the TTL is served without paging RD again."""
+    from app.services.rd_cache import get_all_torrents_cached
+    mocked_responses.get(f"{_RD_API}/torrents?page=1", json=[{"id": "t1"}], status=200)
+    mocked_responses.get(f"{_RD_API}/torrents?page=2", status=204)
+
+    first = get_all_torrents_cached(real_rd_service)
+    fetched = len(mocked_responses.calls)
+    assert get_all_torrents_cached(real_rd_service) is first
+    assert len(mocked_responses.calls) == fetched
+
+
+def test_all_torrents_cached_single_flight():
+    """Concurrent misses for one API key share a single upstream fetch."""
+    from unittest.mock import MagicMock
+    from app.services.rd_cache import get_all_torrents_cached
+    release = threading.Event()
+    service = MagicMock(api_key="key_a")
+
+    def slow_fetch():
+        release.wait(timeout=5)
+        return [{"id": "t1"}]
+
+    service.get_all_torrents.side_effect = slow_fetch
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(get_all_torrents_cached(service)))
+        for _ in range(4)
+    ]
+    for t in threads:
+        t.start()
+    release.set()
+    for t in threads:
+        t.join(timeout=5)
+
+    assert service.get_all_torrents.call_count == 1
+    assert results == [[{"id": "t1"}]] * 4
+
+    # A different API key gets its own entry
+    other = MagicMock(api_key="key_b")
+    other.get_all_torrents.return_value = []
+    assert get_all_torrents_cached(other) == []
+    other.get_all_torrents.assert_called_once()
+
+
+def test_batch_unrestrict_runs_links_concurrently():
+    """Both calls must be in flight at once to pass the barrier."""
+    from unittest.mock import MagicMock
+    from app.services.rd_cache import batch_unrestrict
+    barrier = threading.Barrier(2, timeout=2)
+    service = MagicMock()
+
+    def unrestrict(link):
+        barrier.wait()
+        return link.replace("rd.link", "cdn")
 
-def test_real_debrid_select_files(app, mocked_responses):
-    """Test RealDebridService.select_files()."""
-    with app.app_context():
-        service = RealDebridService(api_key="test_rd_key")
-
-        mocked_responses.post(
-            "https://api.real-debrid.com/rest/1.0/torrents/selectFiles/tid123",
-            status=204,
-        )
-        assert service.select_files("tid123") is True
+    service.unrestrict_link.side_effect = unrestrict
+    links = ["https://rd.link/a", "https://rd.link/b"]
+    assert batch_unrestrict(service, links) == ["https://cdn/a", "https://cdn/b"]
 
 
 # ── RDCachedLinkService tests ─────────────────────────────────
 
-def test_rd_cached_link_check_instant_availability(app, mocked_responses):
+def test_rd_cached_link_check_instant_availability(mocked_responses):
     """Test the internal _check_instant_availability method."""
-    with app.app_context():
-        from app.services.rd_cached_link import RDCachedLinkService
-        service = RDCachedLinkService(api_key="test_rd_key")
-
-        infohash = "abcdef1234567890abcdef1234567890abcdef12"
-        mocked_responses.get(
-            f"https://api.real-debrid.com/rest/1.0/torrents/instantAvailability/{infohash}",
-            json={
-                infohash: {
-                    "rd": [
-                        {"1": {"filename": "movie.mkv", "filesize": 5000000000}}
-                    ]
-                }
-            },
-            status=200,
-        )
-
-        result = service._check_instant_availability(infohash, "5000000000")
-        assert result["is_fully_cached"] is True
-        assert result["infohash"] == infohash
-
-
-def test_rd_cached_link_not_cached(app, mocked_responses):
+    from app.services.rd_cached_link import RDCachedLinkService
+    service = RDCachedLinkService(api_key="test_rd_key")
+
+    infohash = "abcdef1234567890abcdef1234567890abcdef12"
+    mocked_responses.get(
+        f"https://api.real-debrid.com/rest/1.0/torrents/instantAvailability/{infohash}",
+        json={
+            infohash: {
+                "rd": [
+                    {"1": {"filename": "movie.mkv", "filesize": 5000000000}}
+                ]
+            }
+        },
+        status=200,
+    )
+
+    result = service._check_instant_availability(infohash, "5000000000")
+    assert result["is_fully_cached"] is True
+    assert result["infohash"] == infohash
+
+
+def test_rd_cached_link_not_cached(mocked_responses):
     """Test _check_instant_availability when torrent is NOT cached."""
-    with app.app_context():
-        from app.services.rd_cached_link import RDCachedLinkService
-        service = RDCachedLinkService(api_key="test_rd_key")
+    from app.services.rd_cached_link import RDCachedLinkService
+    service = RDCachedLinkService(api_key="test_rd_key")
 
-        infohash = "abcdef1234567890abcdef1234567890abcdef12"
-        mocked_responses.get(
-            f"https://api.real-debrid.com/rest/1.0/torrents/instantAvailability/{infohash}",
-            json={},
-            status=200,
-        )
+    infohash = "abcdef1234567890abcdef1234567890abcdef12"
+    mocked_responses.get(
+        f"https://api.real-debrid.com/rest/1.0/torrents/instantAvailability/{infohash}",
+        json={},
+        status=200,
+    )
 
-        result = service._check_instant_availability(infohash, "5000000000")
-        assert result["is_fully_cached"] is False
+    result = service._check_instant_availability(infohash, "5000000000")
+    assert result["is_fully_cached"] is False
 
 
 # ── JackettSearchService tests ────────────────────────────────
 
-def test_jackett_search(app, mocked_responses):
-    with app.app_context():
-        service = JackettSearchService(api_key="test_jackett", base_url="http://localhost:9117")
-
-        jackett_xml = b'''<?xml version="1.0" encoding="UTF-8"?>
-        <rss version="1.0" xmlns:torznab="http://torznab.com/schemas/2015/feed">
-        <channel>
-            <item>
-                <title>Test Movie 1080p</title>
-                <link>magnet:?xt=urn:btih:1234567890abcdef1234567890abcdef12345678</link>
-                <size>1048576000</size>
-                <torznab:attr name="seeders" value="100" />
-                <torznab:attr name="peers" value="20" />
-                <torznab:attr name="category" value="2000" />
-            </item>
-        </channel>
-        </rss>
-        '''
-        mocked_responses.get(
-            "http://localhost:9117/api/v2.0/indexers/all/results/torznab/api",
-            body=jackett_xml,
-            status=200,
-            content_type="application/xml"
-        )
-
-        results, elapsed = service.search("test query", limit=1)
-        assert len(results) == 1
+@pytest.mark.parametrize("xml_body,expected_count", [
+    (_JACKETT_XML_ONE_ITEM, 1),
+    (_JACKETT_XML_EMPTY, 0),
+], ids=["one_item", "empty"])
+def test_jackett_search(jackett_service, mocked_responses, xml_body, expected_count):
+    mocked_responses.get(
+        "http://localhost:9117/api/v2.0/indexers/all/results/torznab/api",
+        body=xml_body,
+        status=200,
+        content_type="application/xml"
+    )
+
+    results, elapsed = jackett_service.search("test query", limit=1)
+    assert len(results) == expected_count
+    if expected_count:
         assert results[0]["title"] == "Test Movie 1080p"
         assert results[0]["infohash"] == "1234567890abcdef1234567890abcdef12345678"
 
-        # Test empty response (no results)
-        mocked_responses.replace(
-            responses.GET,
-            "http://localhost:9117/api/v2.0/indexers/all/results/torznab/api",
-            body=b"<?xml version=\"1.0\" encoding=\"UTF-8\"?><rss version=\"1.0\"><channel></channel></rss>",
-            status=200,
-            content_type="application/xml"
-        )
-        empty_results, _ = service.search("test query", limit=1)
-        assert len(empty_results) == 0
+
+def test_jackett_search_logs_non_rss_body(jackett_service, mocked_responses, caplog):
+    """An HTML error page is not mistaken for an empty feed."""
+    mocked_responses.get(
+        "http://localhost:9117/api/v2.0/indexers/all/results/torznab/api",
+        body=b"<html><body><h1>502 Bad Gateway</h1><hr></body>",
+        status=200,
+        content_type="text/html"
+    )
+
+    results, _ = jackett_service.search("test query", limit=1)
+    assert results == []
+    assert "Failed to parse XML data" in caplog.text
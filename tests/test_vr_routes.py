@@ -5,15 +5,14 @@
 import json
 import os
 import pytest
-import tempfile
 from unittest.mock import patch, MagicMock
 
+from app.services.real_debrid import RealDebridError
 
-# ── Shared mock data ─────────────────────────────────────────
 
-MOCK_USER = {"id": 12345, "username": "testuser"}
+# ── Shared mock data ─────────────────────────────────────────
 
-MOCK_TORRENTS = [
+MOCK_TORRENTS = (
     {
         "id": "torrent1",
         "filename": "Great.VR.Video_180_SBS.mp4",
@@ -32,7 +31,10 @@ MOCK_TORRENTS = [
         "added": "2026-01-01T10:00:00.000Z",
         "links": [],
     },
-]
+)
+
+# Filtered once; the library endpoints list exactly these
+MOCK_DOWNLOADED = tuple(t for t in MOCK_TORRENTS if t["status"] == "downloaded")
 
 MOCK_TORRENT_INFO = {
     "id": "torrent1",
@@ -47,87 +49,86 @@ MOCK_TORRENT_INFO = {
 }
 
 
+
+@pytest.fixture
+def user_store(monkeypatch):
+    """The UserDataStore mock returned by both VR blueprints' _get_user_data()."""
+    store = MagicMock()
+    for module in ("app.routes.heresphere", "app.routes.deovr"):
+        monkeypatch.setattr(f"{module}._get_user_data", lambda: store)
+    return store
+
+
+@pytest.fixture(autouse=True)
+def _shutdown_thumb_pools():
+    """Shut down the pool of every ThumbnailService a test builds."""
+    from app.services.thumbnail import _live_services
+    before = set(_live_services)
+    yield
+    for svc in set(_live_services) - before:
+        svc.shutdown()
+
+
+@pytest.fixture
+def thumb_service(monkeypatch):
+    """The ThumbnailService mock returned by the HereSphere _get_thumb_service()."""
+    svc = MagicMock()
+    monkeypatch.setattr("app.routes.heresphere._get_thumb_service", lambda: svc)
+    return svc
+
+
 # ── HereSphere tests ─────────────────────────────────────────
 
-def test_heresphere_library_json(client, mocked_responses):
+def test_heresphere_library_json(client, rd_service, json_body):
     """POST /heresphere returns JSON library for API clients."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
-    with patch('app.services.real_debrid.RealDebridService.get_all_torrents') as mock:
-        mock.return_value = MOCK_TORRENTS
-        response = client.post("/heresphere")
+    rd_service.get_all_torrents.return_value = MOCK_TORRENTS
+    response = client.post("/heresphere")
 
     assert response.status_code == 200
-    data = response.json
+    data = json_body(response)
     assert data["access"] == 1
     assert "library" in data
     # Only 'downloaded' torrents should appear
     total_urls = sum(len(section["list"]) for section in data["library"])
-    assert total_urls == 1
+    assert total_urls == len(MOCK_DOWNLOADED)
 
 
-def test_heresphere_library_favorites_section(client, mocked_responses):
+def test_heresphere_library_favorites_section(client, rd_service, user_store, json_body):
     """Favorited torrents appear in a 'Favorites' section at the top."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
-    with patch('app.services.real_debrid.RealDebridService.get_all_torrents') as mock, \
-         patch('app.routes.heresphere._get_user_data') as mock_ud:
-        mock.return_value = MOCK_TORRENTS
-        # Simulate torrent1 being favorited
-        store = MagicMock()
-        store.is_favorite.side_effect = lambda tid: tid == "torrent1"
-        mock_ud.return_value = store
-        response = client.post("/heresphere")
-
-    data = response.json
+    rd_service.get_all_torrents.return_value = MOCK_TORRENTS
+    # Simulate torrent1 being favorited
+    user_store.is_favorite.side_effect = lambda tid: tid == "torrent1"
+    response = client.post("/heresphere")
+
+    data = json_body(response)
     assert data["library"][0]["name"] == "Favorites"
     assert len(data["library"][0]["list"]) == 1
     assert "torrent1" in data["library"][0]["list"][0]
 
 
-def test_heresphere_library_no_favorites_section_when_empty(client, mocked_responses):
+def test_heresphere_library_no_favorites_section_when_empty(client, rd_service, user_store, json_body):
     """No 'Favorites' section when nothing is favorited."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
-    with patch('app.services.real_debrid.RealDebridService.get_all_torrents') as mock, \
-         patch('app.routes.heresphere._get_user_data') as mock_ud:
-        mock.return_value = MOCK_TORRENTS
-        store = MagicMock()
-        store.is_favorite.return_value = False
-        mock_ud.return_value = store
-        response = client.post("/heresphere")
-
-    data = response.json
+    rd_service.get_all_torrents.return_value = MOCK_TORRENTS
+    user_store.is_favorite.return_value = False
+    response = client.post("/heresphere")
+
+    data = json_body(response)
     section_names = [s["name"] for s in data["library"]]
     assert "Favorites" not in section_names
 
 
-def test_heresphere_library_html(client, mocked_responses):
+def test_heresphere_library_html(client, rd_service):
     """GET /heresphere with Accept: text/html returns the browser view."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
-    with patch('app.services.real_debrid.RealDebridService.get_all_torrents') as mock:
-        mock.return_value = MOCK_TORRENTS
-        response = client.get("/heresphere", headers={"Accept": "text/html"})
+    rd_service.get_all_torrents.return_value = MOCK_TORRENTS
+    response = client.get("/heresphere", headers={"Accept": "text/html"})
 
     assert response.status_code == 200
-    assert b"HereSphere" in response.data or b"heresphere" in response.data.lower()
+    html = response.data
+    assert b"HereSphere" in html or b"heresphere" in html.lower()
 
 
-def test_heresphere_video_detail_metadata(client, mocked_responses):
+def test_heresphere_video_detail_metadata(client, mocked_responses, json_body):
     """POST /heresphere/<id> with needsMediaSource=false returns full metadata."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
     mocked_responses.get(
         "https://api.real-debrid.com/rest/1.0/torrents/info/torrent1",
         json=MOCK_TORRENT_INFO, status=200,
@@ -137,7 +138,7 @@ def test_heresphere_video_detail_metadata(client, mocked_responses):
         json={"needsMediaSource": False},
     )
     assert response.status_code == 200
-    data = response.json
+    data = json_body(response)
     assert data["access"] == 1
     assert "title" in data
     assert data["media"] == []
@@ -167,12 +168,8 @@ def test_heresphere_video_detail_metadata(client, mocked_responses):
     assert "Feature:SBS" in tag_names
 
 
-def test_heresphere_video_detail_with_media(client, mocked_responses):
+def test_heresphere_video_detail_with_media(client, mocked_responses, json_body):
     """POST /heresphere/<id> with needsMediaSource=true returns playable sources."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
     mocked_responses.get(
         "https://api.real-debrid.com/rest/1.0/torrents/info/torrent1",
         json=MOCK_TORRENT_INFO, status=200,
@@ -185,7 +182,7 @@ def test_heresphere_video_detail_with_media(client, mocked_responses):
         )
 
     assert response.status_code == 200
-    data = response.json
+    data = json_body(response)
     assert len(data["media"]) == 1
     assert "url" in data["media"][0]["sources"][0]
     # Enriched fields should still be present on full response
@@ -194,91 +191,138 @@ def test_heresphere_video_detail_with_media(client, mocked_responses):
     assert data["writeFavorite"] is True
 
 
-# ── Write-back tests (XBVR pattern) ──────────────────────────
+def test_heresphere_video_detail_etag_skips_unrestrict(client, mocked_responses):
+    """A matching If-None-Match gets a 304 without unrestricting any links."""
+    mocked_responses.get(
+        "https://api.real-debrid.com/rest/1.0/torrents/info/torrent1",
+        json={**MOCK_TORRENT_INFO, "hash": "abc123"}, status=200,
+    )
+    with patch('app.services.real_debrid.RealDebridService.unrestrict_link') as mock_unrestrict:
+        mock_unrestrict.return_value = "https://unrestricted.real-debrid.com/video.mp4"
+        response = client.post("/heresphere/torrent1", json={"needsMediaSource": True})
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        assert etag.startswith('W/"abc123-')
+        assert response.headers["Cache-Control"] == "private, max-age=5"
+        assert mock_unrestrict.call_count == 1
 
-def test_heresphere_write_favorite(client, mocked_responses):
-    """POST /heresphere/<id> with isFavorite=true persists the favorite."""
+        response = client.post(
+            "/heresphere/torrent1",
+            json={"needsMediaSource": True},
+            headers={"If-None-Match": etag},
+        )
+        assert response.status_code == 304
+        assert response.data == b""
+        assert mock_unrestrict.call_count == 1
+
+        # The metadata-only shape is a different representation
+        response = client.post(
+            "/heresphere/torrent1",
+            json={"needsMediaSource": False},
+            headers={"If-None-Match": etag},
+        )
+        assert response.status_code == 200
+
+
+def test_heresphere_video_detail_no_etag_on_unrestrict_failure(client, mocked_responses, json_body):
+    """Restricted fallback links are served without an ETag, so they are not revalidated."""
     mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
+        "https://api.real-debrid.com/rest/1.0/torrents/info/torrent1",
+        json={**MOCK_TORRENT_INFO, "hash": "abc123"}, status=200,
+    )
+    with patch('app.services.real_debrid.RealDebridService.unrestrict_link',
+               side_effect=RealDebridError("rate limited")):
+        response = client.post("/heresphere/torrent1", json={"needsMediaSource": True})
+
+    assert response.status_code == 200
+    assert json_body(response)["media"][0]["sources"][0]["url"] == "https://real-debrid.com/d/link1"
+    assert "ETag" not in response.headers
+
+
+def test_heresphere_video_detail_etag_tracks_links(client, mocked_responses):
+    """New RD links under the same hash change the ETag instead of a 304."""
+    from app.services.rd_cache import clear_caches
+    url = "https://api.real-debrid.com/rest/1.0/torrents/info/torrent1"
+    mocked_responses.get(url, json={**MOCK_TORRENT_INFO, "hash": "abc123"}, status=200)
+    mocked_responses.get(url, json={**MOCK_TORRENT_INFO, "hash": "abc123",
+                                    "links": ["https://real-debrid.com/d/link2"]}, status=200)
+
+    response = client.post("/heresphere/torrent1", json={"needsMediaSource": False})
+    etag = response.headers["ETag"]
+
+    clear_caches()  # the torrent-info TTL runs out
+    response = client.post(
+        "/heresphere/torrent1",
+        json={"needsMediaSource": False},
+        headers={"If-None-Match": etag},
     )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.headers["ETag"].startswith('W/"abc123-')
+
+
+# ── Write-back tests (XBVR pattern) ──────────────────────────
+
+def test_heresphere_write_favorite(client, mocked_responses, user_store, json_body):
+    """POST /heresphere/<id> with isFavorite=true persists the favorite."""
     mocked_responses.get(
         "https://api.real-debrid.com/rest/1.0/torrents/info/torrent1",
         json=MOCK_TORRENT_INFO, status=200,
     )
 
-    with patch('app.routes.heresphere._get_user_data') as mock_store:
-        store = MagicMock()
-        mock_store.return_value = store
-        store.is_favorite.return_value = True
-        store.get_rating.return_value = 0.0
-        store.get_playback_time.return_value = 0.0
+    user_store.is_favorite.return_value = True
+    user_store.get_rating.return_value = 0.0
+    user_store.get_playback_time.return_value = 0.0
 
-        response = client.post(
-            "/heresphere/torrent1",
-            json={"needsMediaSource": False, "isFavorite": True},
-        )
+    response = client.post(
+        "/heresphere/torrent1",
+        json={"needsMediaSource": False, "isFavorite": True},
+    )
 
     assert response.status_code == 200
-    assert response.json["isFavorite"] is True
+    assert json_body(response)["isFavorite"] is True
     # Verify the store was called with the write-back data
-    store.process_heresphere_update.assert_called_once_with(
+    user_store.process_heresphere_update.assert_called_once_with(
         "torrent1", {"needsMediaSource": False, "isFavorite": True}
     )
 
 
-def test_heresphere_write_rating(client, mocked_responses):
+def test_heresphere_write_rating(client, mocked_responses, user_store, json_body):
     """POST /heresphere/<id> with rating=4.5 persists the rating."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
     mocked_responses.get(
         "https://api.real-debrid.com/rest/1.0/torrents/info/torrent1",
         json=MOCK_TORRENT_INFO, status=200,
     )
 
-    with patch('app.routes.heresphere._get_user_data') as mock_store:
-        store = MagicMock()
-        mock_store.return_value = store
-        store.is_favorite.return_value = False
-        store.get_rating.return_value = 4.5
-        store.get_playback_time.return_value = 0.0
+    user_store.is_favorite.return_value = False
+    user_store.get_rating.return_value = 4.5
+    user_store.get_playback_time.return_value = 0.0
 
-        response = client.post(
-            "/heresphere/torrent1",
-            json={"needsMediaSource": False, "rating": 4.5},
-        )
+    response = client.post(
+        "/heresphere/torrent1",
+        json={"needsMediaSource": False, "rating": 4.5},
+    )
 
     assert response.status_code == 200
-    assert response.json["rating"] == 4.5
-    store.process_heresphere_update.assert_called_once()
+    assert json_body(response)["rating"] == 4.5
+    user_store.process_heresphere_update.assert_called_once()
 
 
-def test_heresphere_launch(client, mocked_responses):
+def test_heresphere_launch(client, json_body):
     """POST /heresphere/launch_heresphere launches the executable."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
     with patch('app.services.vr_helper.find_heresphere_exe', return_value="/usr/bin/heresphere"), \
-         patch('subprocess.Popen') as mock_popen:
-        mock_popen.return_value = MagicMock()
+         patch('subprocess.Popen'):
         response = client.post(
             "/heresphere/launch_heresphere",
             json={"video_url": "https://example.com/video.mp4"},
         )
 
     assert response.status_code == 200
-    assert response.json["status"] == "success"
+    assert json_body(response)["status"] == "success"
 
 
-def test_heresphere_launch_no_url(client, mocked_responses):
+def test_heresphere_launch_no_url(client):
     """POST /heresphere/launch_heresphere without URL returns 400."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
     response = client.post(
         "/heresphere/launch_heresphere",
         json={},
@@ -288,94 +332,83 @@ def test_heresphere_launch_no_url(client, mocked_responses):
 
 # ── Thumbnail endpoint tests ─────────────────────────────────
 
-def test_heresphere_thumb_cached(client, mocked_responses):
+def test_heresphere_thumb_cached(app, client, thumb_service, tmp_path):
     """GET /heresphere/thumb/<id> serves a cached thumbnail."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
-    # Create a fake cached thumbnail
-    with patch('app.routes.heresphere._get_thumb_service') as mock_svc:
-        svc = MagicMock()
-        mock_svc.return_value = svc
+    # Simulate a cached JPEG file
+    cached = tmp_path / "cached.jpg"
+    cached.write_bytes(b'\xff\xd8\xff\xe0' + b'\x00' * 100)  # Fake JPEG header
 
-        # Simulate a cached JPEG file
-        with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as f:
-            f.write(b'\xff\xd8\xff\xe0' + b'\x00' * 100)  # Fake JPEG header
-            tmp_path = f.name
+    thumb_service.get_cached_path.return_value = str(cached)
+    response = client.get("/heresphere/thumb/torrent1")
+    assert response.status_code == 200
+    assert response.content_type == 'image/jpeg'
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'public, max-age=86400'
+
+    # Revalidation with the same ETag returns 304 and no body
+    response = client.get("/heresphere/thumb/torrent1", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    # Under gunicorn/uwsgi the file goes out via wsgi.file_wrapper (sendfile)
+    from werkzeug.wsgi import FileWrapper
+    from app.routes.heresphere import thumbnail
+    with app.test_request_context(environ_base={"wsgi.file_wrapper": FileWrapper}):
+        response = thumbnail("torrent1")
+    assert response.direct_passthrough is True
+    assert isinstance(response.response, FileWrapper)
+    response.close()
+
+
+def test_heresphere_thumb_no_ffmpeg(client, thumb_service):
+    """GET /heresphere/thumb/<id> returns 404 when ffmpeg is unavailable."""
+    thumb_service.get_cached_path.return_value = None
+    thumb_service.available = False
 
-        try:
-            svc.get_cached_path.return_value = tmp_path
-            response = client.get("/heresphere/thumb/torrent1")
-            assert response.status_code == 200
-            assert response.content_type == 'image/jpeg'
-        finally:
-            os.unlink(tmp_path)
+    response = client.get("/heresphere/thumb/torrent1")
+    assert response.status_code == 404
 
 
-def test_heresphere_thumb_no_ffmpeg(client, mocked_responses):
-    """GET /heresphere/thumb/<id> returns 404 when ffmpeg is unavailable."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
-    with patch('app.routes.heresphere._get_thumb_service') as mock_svc:
-        svc = MagicMock()
-        mock_svc.return_value = svc
-        svc.get_cached_path.return_value = None
-        svc.available = False
+def test_heresphere_thumb_evicted_behind_cache(client, monkeypatch, tmp_path):
+    """A remembered thumbnail deleted by another worker is forgotten, not a 500."""
+    from app.services.thumbnail import ThumbnailService
+    with patch('shutil.which', return_value=None):
+        svc = ThumbnailService(cache_dir=str(tmp_path),
+                               preview_dir=str(tmp_path / "previews"))
+    monkeypatch.setattr("app.routes.heresphere._get_thumb_service", lambda: svc)
+    (tmp_path / "torrent1.jpg").write_bytes(b'\xff\xd8\xff\xe0' + b'\x00' * 100)
+    assert svc.get_cached_path("torrent1")
 
-        response = client.get("/heresphere/thumb/torrent1")
-        assert response.status_code == 404
+    (tmp_path / "torrent1.jpg").unlink()
+    response = client.get("/heresphere/thumb/torrent1")
+    assert response.status_code == 404  # falls through to generation; no ffmpeg here
+    assert svc.get_cached_path("torrent1") is None
 
 
 # ── Preview clip endpoint tests ───────────────────────────────
 
-def test_heresphere_preview_cached(client, mocked_responses):
+def test_heresphere_preview_cached(client, thumb_service, tmp_path):
     """GET /heresphere/preview/<id> serves a cached preview clip."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
-    with patch('app.routes.heresphere._get_thumb_service') as mock_svc:
-        svc = MagicMock()
-        mock_svc.return_value = svc
-
-        with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as f:
-            f.write(b'\x00\x00\x00\x1cftypisom' + b'\x00' * 100)  # Fake MP4
-            tmp_path = f.name
+    cached = tmp_path / "cached.mp4"
+    cached.write_bytes(b'\x00\x00\x00\x1cftypisom' + b'\x00' * 100)  # Fake MP4
 
-        try:
-            svc.get_cached_preview_path.return_value = tmp_path
-            response = client.get("/heresphere/preview/torrent1")
-            assert response.status_code == 200
-            assert response.content_type == 'video/mp4'
-        finally:
-            os.unlink(tmp_path)
+    thumb_service.get_cached_preview_path.return_value = str(cached)
+    response = client.get("/heresphere/preview/torrent1")
+    assert response.status_code == 200
+    assert response.content_type == 'video/mp4'
 
 
-def test_heresphere_preview_no_ffmpeg(client, mocked_responses):
+def test_heresphere_preview_no_ffmpeg(client, thumb_service):
     """GET /heresphere/preview/<id> returns 404 when ffmpeg is unavailable."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
-    with patch('app.routes.heresphere._get_thumb_service') as mock_svc:
-        svc = MagicMock()
-        mock_svc.return_value = svc
-        svc.get_cached_preview_path.return_value = None
-        svc.available = False
+    thumb_service.get_cached_preview_path.return_value = None
+    thumb_service.available = False
 
-        response = client.get("/heresphere/preview/torrent1")
-        assert response.status_code == 404
+    response = client.get("/heresphere/preview/torrent1")
+    assert response.status_code == 404
 
 
-def test_heresphere_video_detail_includes_preview_url(client, mocked_responses):
+def test_heresphere_video_detail_includes_preview_url(client, mocked_responses, json_body):
     """Video detail response includes thumbnailVideo pointing to preview endpoint."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
     mocked_responses.get(
         "https://api.real-debrid.com/rest/1.0/torrents/info/torrent1",
         json=MOCK_TORRENT_INFO, status=200,
@@ -385,32 +418,32 @@ def test_heresphere_video_detail_includes_preview_url(client, mocked_responses):
         json={"needsMediaSource": False},
         content_type="application/json",
     )
-    data = response.json
+    data = json_body(response)
     assert "thumbnailVideo" in data
     assert "/heresphere/preview/torrent1" in data["thumbnailVideo"]
 
 
 # ── Preview service unit tests ────────────────────────────────
 
-def test_preview_service_no_ffmpeg():
+def test_preview_service_no_ffmpeg(tmp_path):
     """generate_preview returns None when ffmpeg is missing."""
     from app.services.thumbnail import ThumbnailService
     with patch('shutil.which', return_value=None):
-        svc = ThumbnailService(cache_dir=tempfile.mkdtemp(),
-                               preview_dir=tempfile.mkdtemp())
+        svc = ThumbnailService(cache_dir=str(tmp_path / "thumbs"),
+                               preview_dir=str(tmp_path / "previews"))
     assert svc.generate_preview("test", "http://example.com/v.mp4") is None
 
 
-def test_preview_service_cache_hit():
+def test_preview_service_cache_hit(tmp_path):
     """generate_preview returns cached path without running ffmpeg."""
     from app.services.thumbnail import ThumbnailService
-    preview_dir = tempfile.mkdtemp()
+    preview_dir = str(tmp_path)
     cached_file = os.path.join(preview_dir, "cached_id.mp4")
     with open(cached_file, 'wb') as f:
         f.write(b'\x00' * 100)
 
     with patch('shutil.which', return_value="/usr/bin/ffmpeg"):
-        svc = ThumbnailService(cache_dir=tempfile.mkdtemp(),
+        svc = ThumbnailService(cache_dir=str(tmp_path / "thumbs"),
                                preview_dir=preview_dir)
     assert svc.get_cached_preview_path("cached_id") == cached_file
     assert svc.generate_preview("cached_id", "http://example.com/v.mp4") == cached_file
@@ -418,22 +451,18 @@ def test_preview_service_cache_hit():
 
 # ── DeoVR tests ───────────────────────────────────────────────
 
-def test_deovr_library(client, mocked_responses):
+def test_deovr_library(client, rd_service, json_body):
     """GET /deovr returns DeoVR JSON library with thumbnail URLs."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
-    with patch('app.services.real_debrid.RealDebridService.get_all_torrents') as mock:
-        mock.return_value = MOCK_TORRENTS
-        response = client.get("/deovr")
+    rd_service.get_all_torrents.return_value = MOCK_TORRENTS
+    response = client.get("/deovr")
 
     assert response.status_code == 200
-    data = response.json
+    assert response.is_streamed
+    data = json_body(response)
     assert data["authorized"] == "1"
     assert len(data["scenes"]) == 1
     # Only 'downloaded' torrents should appear
-    assert len(data["scenes"][0]["list"]) == 1
+    assert len(data["scenes"][0]["list"]) == len(MOCK_DOWNLOADED)
     # Thumbnail URL should be present
     video = data["scenes"][0]["list"][0]
     assert "thumbnailUrl" in video
@@ -442,12 +471,8 @@ def test_deovr_library(client, mocked_responses):
     assert "." not in video["title"] or video["title"].endswith(".mp4")
 
 
-def test_deovr_video_detail_metadata(client, mocked_responses):
+def test_deovr_video_detail_metadata(client, mocked_responses, json_body):
     """POST /deovr/<id> with needsMediaSource=false returns metadata with thumbnail."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
     mocked_responses.get(
         "https://api.real-debrid.com/rest/1.0/torrents/info/torrent1",
         json=MOCK_TORRENT_INFO, status=200,
@@ -457,7 +482,7 @@ def test_deovr_video_detail_metadata(client, mocked_responses):
         json={"needsMediaSource": False},
     )
     assert response.status_code == 200
-    data = response.json
+    data = json_body(response)
     assert "screenType" in data
     assert "stereoMode" in data
     assert data["screenType"] == "dome"
@@ -467,12 +492,8 @@ def test_deovr_video_detail_metadata(client, mocked_responses):
     assert "/heresphere/thumb/torrent1" in data["thumbnailUrl"]
 
 
-def test_deovr_video_detail_with_media(client, mocked_responses):
+def test_deovr_video_detail_with_media(client, mocked_responses, json_body):
     """POST /deovr/<id> with needsMediaSource=true returns playable sources with favorite."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
     mocked_responses.get(
         "https://api.real-debrid.com/rest/1.0/torrents/info/torrent1",
         json=MOCK_TORRENT_INFO, status=200,
@@ -485,29 +506,24 @@ def test_deovr_video_detail_with_media(client, mocked_responses):
         )
 
     assert response.status_code == 200
-    data = response.json
+    data = json_body(response)
     assert "encodings" in data
     assert len(data["encodings"][0]["videoSources"]) == 1
     # isFavorite should be present (read from shared store)
     assert "isFavorite" in data
 
 
-def test_deovr_launch(client, mocked_responses):
+def test_deovr_launch(client, json_body):
     """POST /deovr/launch_heresphere launches the executable."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
     with patch('app.services.vr_helper.find_heresphere_exe', return_value="/usr/bin/heresphere"), \
-         patch('subprocess.Popen') as mock_popen:
-        mock_popen.return_value = MagicMock()
+         patch('subprocess.Popen'):
         response = client.post(
             "/deovr/launch_heresphere",
             json={"video_url": "https://example.com/video.mp4"},
         )
 
     assert response.status_code == 200
-    assert response.json["status"] == "success"
+    assert json_body(response)["status"] == "success"
 
 
 # ── Projection guessing tests ────────────────────────────────
@@ -556,6 +572,17 @@ def test_guess_projection_flat():
     assert fov == 90.0
 
 
+def test_guess_projection_is_memoized():
+    """Repeated filenames are answered from the LRU cache."""
+    from app.services.vr_helper import guess_projection
+    guess_projection.cache_clear()
+    first = guess_projection("Video_180_SBS.mp4")
+    assert guess_projection("Video_180_SBS.mp4") == first
+    info = guess_projection.cache_info()
+    assert info.hits == 1
+    assert info.misses == 1
+
+
 def test_guess_projection_deovr_mapping():
     """DeoVR uses different screen type names."""
     from app.services.vr_helper import guess_projection_deovr
@@ -576,19 +603,19 @@ def test_guess_projection_deovr_mapping():
 
 # ── ThumbnailService unit tests ──────────────────────────────
 
-def test_thumbnail_service_no_ffmpeg():
+def test_thumbnail_service_no_ffmpeg(tmp_path):
     """ThumbnailService.available is False when ffmpeg is missing."""
     from app.services.thumbnail import ThumbnailService
     with patch('shutil.which', return_value=None):
-        svc = ThumbnailService(cache_dir=tempfile.mkdtemp())
+        svc = ThumbnailService(cache_dir=str(tmp_path / "thumbs"))
     assert svc.available is False
     assert svc.generate("test", "http://example.com/video.mp4") is None
 
 
-def test_thumbnail_service_cache_hit():
+def test_thumbnail_service_cache_hit(tmp_path):
     """ThumbnailService returns cached path without running ffmpeg."""
     from app.services.thumbnail import ThumbnailService
-    cache_dir = tempfile.mkdtemp()
+    cache_dir = str(tmp_path)
     # Pre-populate cache
     cached_file = os.path.join(cache_dir, "cached_id.jpg")
     with open(cached_file, 'wb') as f:
@@ -605,12 +632,250 @@ def test_thumbnail_service_cache_hit():
     assert result == cached_file
 
 
+def test_thumbnail_service_remembers_cached_path(tmp_path):
+    """A repeat get_cached_path() is answered from memory without a stat()."""
+    from app.services.thumbnail import ThumbnailService
+    cache_dir = str(tmp_path)
+    with open(os.path.join(cache_dir, "mem_id.jpg"), 'wb') as f:
+        f.write(b'\xff\xd8\xff\xe0JFIF')
+    svc = ThumbnailService(cache_dir=cache_dir, preview_dir=str(tmp_path / "previews"))
+
+    with patch('os.path.isfile', wraps=os.path.isfile) as mock_isfile:
+        first = svc.get_cached_path("mem_id")
+        assert mock_isfile.call_count == 1
+        assert svc.get_cached_path("mem_id") == first
+        assert mock_isfile.call_count == 1
+
+
+@pytest.mark.parametrize("method", ["generate", "generate_preview"])
+def test_thumbnail_service_seeks_before_input(method, tmp_path):
+    """ffmpeg gets -ss ahead of -i so it seeks by keyframe instead of decoding."""
+    from app.services.thumbnail import ThumbnailService
+    with patch('shutil.which', return_value="/usr/bin/ffmpeg"):
+        svc = ThumbnailService(cache_dir=str(tmp_path / "thumbs"),
+                               preview_dir=str(tmp_path / "previews"))
+    with patch('subprocess.run') as mock_run:
+        mock_run.return_value = MagicMock(returncode=1, stderr=b"")
+        getattr(svc, method)("seek_id", "http://example.com/video.mp4")
+
+    argv = mock_run.call_args_list[0].args[0]
+    assert argv.index('-ss') < argv.index('-i')
+
+
+def test_thumbnail_service_pipes_head_bytes(mocked_responses, tmp_path):
+    """generate() pipes a Range-fetched head of the file into ffmpeg."""
+    from app.services.thumbnail import ThumbnailService
+    head = b'\x00\x00\x00\x1cftypisom' + b'\x00' * 1024
+    mocked_responses.get("http://example.com/video.mp4", body=head, status=206)
+    with patch('shutil.which', return_value="/usr/bin/ffmpeg"):
+        svc = ThumbnailService(cache_dir=str(tmp_path / "thumbs"))
+
+    def fake_ffmpeg(argv, **kwargs):
+        if 'pipe:0' in argv:
+            with open(argv[-1], 'wb') as f:
+                f.write(b'\xff\xd8\xff\xe0JFIF')
+        return MagicMock(returncode=0, stdout=b'{}', stderr=b'')
+
+    with patch('subprocess.run', side_effect=fake_ffmpeg) as mock_run:
+        path = svc.generate("head_id", "http://example.com/video.mp4")
+
+    assert path == svc.get_cached_path("head_id")
+    argv = mock_run.call_args_list[0].args[0]
+    assert argv[argv.index('-i') + 1] == 'pipe:0'
+    assert mock_run.call_args_list[0].kwargs['input'] == head
+    assert mocked_responses.calls[0].request.headers['Range'] == f"bytes=0-{3 * 1024 * 1024 - 1}"
+    assert argv[argv.index('-ss') + 1] == '1'
+
+
+def test_thumbnail_service_skips_head_after_container_miss(mocked_responses, tmp_path):
+    """Once a container's head bytes fail to decode, its files skip the head fetch."""
+    from app.services.thumbnail import ThumbnailService
+    mocked_responses.get("http://example.com/a.mp4", body=b'\x00' * 1024, status=206)
+    mocked_responses.get("http://example.com/b.mp4", body=b'\x00' * 1024, status=206)
+    with patch('shutil.which', return_value="/usr/bin/ffmpeg"):
+        svc = ThumbnailService(cache_dir=str(tmp_path / "thumbs"))
+
+    def fake_ffmpeg(argv, **kwargs):
+        if 'pipe:0' in argv:
+            return MagicMock(returncode=1, stdout=b'', stderr=b'moov atom not found')
+        if '-frames:v' in argv:
+            with open(argv[-1], 'wb') as f:
+                f.write(b'\xff\xd8\xff\xe0JFIF')
+        return MagicMock(returncode=0, stdout=b'{}', stderr=b'')
+
+    with patch('subprocess.run', side_effect=fake_ffmpeg) as mock_run:
+        assert svc.generate("a", "http://example.com/a.mp4")
+        assert svc.generate("b", "http://example.com/b.mp4")
+
+    assert len(mocked_responses.calls) == 1
+    piped = [c for c in mock_run.call_args_list if 'pipe:0' in c.args[0]]
+    assert len(piped) == 1
+
+
+def test_thumbnail_service_generate_async_single_flight(tmp_path):
+    """Concurrent generate_async() calls for one ID run ffmpeg once."""
+    import threading
+    from app.services.thumbnail import ThumbnailService
+    with patch('shutil.which', return_value="/usr/bin/ffmpeg"):
+        svc = ThumbnailService(cache_dir=str(tmp_path / "thumbs"),
+                               preview_dir=str(tmp_path / "previews"))
+    release = threading.Event()
+
+    def fake_ffmpeg(argv, **kwargs):
+        release.wait(timeout=5)
+        if '-frames:v' in argv:
+            with open(argv[-1], 'wb') as f:
+                f.write(b'\xff\xd8\xff\xe0JFIF')
+        return MagicMock(returncode=0, stdout=b'{}', stderr=b'')
+
+    with patch.object(svc, '_generate_from_head', return_value=False), \
+         patch('subprocess.run', side_effect=fake_ffmpeg) as mock_run:
+        started = []
+        threads = [
+            threading.Thread(target=lambda: started.append(
+                svc.generate_async("x", "http://example.com/video.mp4")))
+            for _ in range(10)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=5)
+        assert svc.is_generating("x")
+        release.set()
+        svc._pool.shutdown(wait=True)
+
+    assert started.count(True) == 1
+    ffmpeg_calls = [c for c in mock_run.call_args_list if '-frames:v' in c.args[0]]
+    assert len(ffmpeg_calls) == 1
+    assert svc.get_cached_path("x") is not None
+    assert not svc.is_generating("x")
+
+
+def test_thumbnail_service_shutdown_cancels_queued(tmp_path):
+    """shutdown() drops queued generations instead of running them."""
+    import threading
+    from app.services.thumbnail import ThumbnailService, _GEN_WORKERS
+    with patch('shutil.which', return_value="/usr/bin/ffmpeg"):
+        svc = ThumbnailService(cache_dir=str(tmp_path / "thumbs"),
+                               preview_dir=str(tmp_path / "previews"))
+    release = threading.Event()
+    ran = []
+
+    def slow_generate(torrent_id, url):
+        ran.append(torrent_id)
+        release.wait(timeout=5)
+
+    with patch.object(svc, 'generate', side_effect=slow_generate):
+        ids = [f"t{i}" for i in range(_GEN_WORKERS + 3)]
+        for torrent_id in ids:
+            assert svc.generate_async(torrent_id, "http://example.com/video.mp4")
+        queued = [svc._inflight[t] for t in ids[_GEN_WORKERS:]]
+
+        svc.shutdown()
+        assert all(f.cancelled() for f in queued)
+        assert not any(svc.is_generating(t) for t in ids[_GEN_WORKERS:])
+        # A shut-down service refuses new work instead of raising
+        assert svc.generate_async("late", "http://example.com/video.mp4") is False
+
+        release.set()
+        svc._pool.shutdown(wait=True)
+    assert len(ran) <= _GEN_WORKERS
+
+
+def test_thumbnail_service_evicts_least_recently_used(tmp_path):
+    """Writing past max_bytes evicts the least recently accessed thumbnails."""
+    from app.services.thumbnail import ThumbnailService
+    for i in range(5):
+        path = tmp_path / f"t{i}.jpg"
+        path.write_bytes(b'\x00' * 100)
+        os.utime(path, (1000 + i, 1000 + i))  # t0 oldest ... t4 newest
+    (tmp_path / "t1.json").write_text('{"duration_ms": 1000}')
+    with patch('shutil.which', return_value="/usr/bin/ffmpeg"):
+        svc = ThumbnailService(cache_dir=str(tmp_path),
+                               preview_dir=str(tmp_path / "previews"),
+                               max_bytes=450)
+
+    # Reading t0 makes it the most recently used
+    assert svc.get_cached_path("t0")
+
+    def write_thumb(torrent_id, url, output_path, *args):
+        with open(output_path, 'wb') as f:
+            f.write(b'\x00' * 100)
+        return True
+
+    with patch.object(svc, '_generate_from_head', side_effect=write_thumb), \
+         patch.object(svc, 'probe_duration'):
+        svc.generate("new", "http://example.com/video.mp4")
+
+    remaining = sorted(p.name for p in tmp_path.iterdir() if p.is_file())
+    assert remaining == ["new.jpg", "t0.jpg", "t3.jpg", "t4.jpg"]
+    assert svc.get_cached_path("t1") is None
+
+
+def test_thumbnail_service_cap_shared_across_workers(tmp_path):
+    """Two services on one directory (gunicorn workers) share one size cap."""
+    from app.services.thumbnail import ThumbnailService
+    with patch('shutil.which', return_value="/usr/bin/ffmpeg"):
+        workers = [ThumbnailService(cache_dir=str(tmp_path),
+                                    preview_dir=str(tmp_path / "previews"),
+                                    max_bytes=250)
+                   for _ in range(2)]
+
+    def write_thumb(torrent_id, url, output_path, *args):
+        with open(output_path, 'wb') as f:
+            f.write(b'\x00' * 100)
+        return True
+
+    for i in range(6):
+        svc = workers[i % 2]
+        with patch.object(svc, '_generate_from_head', side_effect=write_thumb), \
+             patch.object(svc, 'probe_duration'):
+            svc.generate(f"t{i}", "http://example.com/video.mp4")
+        os.utime(tmp_path / f"t{i}.jpg", (1000 + i, 1000 + i))
+
+    remaining = sorted(p.name for p in tmp_path.iterdir() if p.is_file())
+    assert remaining == ["t4.jpg", "t5.jpg"]
+
+
+def test_thumbnail_service_memory_hits_refresh_atime(tmp_path):
+    """Memory-LRU hits re-stamp atime once the throttle window passes."""
+    from app.services import thumbnail
+    from app.services.thumbnail import ThumbnailService
+    path = tmp_path / "hot.jpg"
+    path.write_bytes(b'\x00' * 100)
+    os.utime(path, (1000, 1000))
+    with patch('shutil.which', return_value="/usr/bin/ffmpeg"):
+        svc = ThumbnailService(cache_dir=str(tmp_path),
+                               preview_dir=str(tmp_path / "previews"))
+
+    with patch.object(thumbnail, 'time', MagicMock(**{'time.return_value': 50_000})):
+        assert svc.get_cached_path("hot")  # disk hit, now remembered
+    assert os.stat(path).st_atime == 50_000
+
+    os.utime(path, (2000, 1000))
+    with patch.object(thumbnail, 'time', MagicMock(**{'time.return_value': 50_001})):
+        assert svc.get_cached_path("hot")  # memory hit within the window
+    assert os.stat(path).st_atime == 2000
+
+    later = 50_000 + thumbnail._ATIME_REFRESH_SECONDS
+    with patch.object(thumbnail, 'time', MagicMock(**{'time.return_value': later})):
+        assert svc.get_cached_path("hot")
+    assert os.stat(path).st_atime == later
+    assert os.stat(path).st_mtime == 1000
+
+    # A refresh that finds the file gone drops the stale memory entry
+    path.unlink()
+    with patch.object(thumbnail, 'time', MagicMock(**{'time.return_value': later * 2})):
+        assert svc.get_cached_path("hot") is None
+    assert "hot" not in svc._mem
+
+
 # ── UserDataStore unit tests ─────────────────────────────────
 
-def test_user_data_store_read_write():
+def test_user_data_store_read_write(tmp_path):
     """UserDataStore persists favorites and ratings to disk."""
     from app.services.user_data import UserDataStore
-    data_dir = tempfile.mkdtemp()
+    data_dir = str(tmp_path)
 
     store = UserDataStore(data_dir=data_dir)
 
@@ -631,10 +896,10 @@ def test_user_data_store_read_write():
     assert store2.get_rating("t1") == 4.5
 
 
-def test_user_data_store_process_update():
+def test_user_data_store_process_update(tmp_path):
     """process_heresphere_update handles isFavorite and rating."""
     from app.services.user_data import UserDataStore
-    data_dir = tempfile.mkdtemp()
+    data_dir = str(tmp_path)
 
     store = UserDataStore(data_dir=data_dir)
     store.process_heresphere_update("t1", {
@@ -647,10 +912,10 @@ def test_user_data_store_process_update():
     assert store.get_rating("t1") == 3.0
 
 
-def test_user_data_store_rating_clamped():
+def test_user_data_store_rating_clamped(tmp_path):
     """Ratings are clamped to 0-5 range."""
     from app.services.user_data import UserDataStore
-    data_dir = tempfile.mkdtemp()
+    data_dir = str(tmp_path)
 
     store = UserDataStore(data_dir=data_dir)
     store.set_rating("t1", 10.0)
@@ -660,10 +925,10 @@ def test_user_data_store_rating_clamped():
     assert store.get_rating("t1") == 0.0
 
 
-def test_user_data_store_ignores_unrelated_fields():
+def test_user_data_store_ignores_unrelated_fields(tmp_path):
     """process_heresphere_update ignores fields it doesn't handle."""
     from app.services.user_data import UserDataStore
-    data_dir = tempfile.mkdtemp()
+    data_dir = str(tmp_path)
 
     store = UserDataStore(data_dir=data_dir)
     store.process_heresphere_update("t1", {
@@ -677,10 +942,10 @@ def test_user_data_store_ignores_unrelated_fields():
 
 # ── Playback event tests ─────────────────────────────────────
 
-def test_user_data_store_playback_tracking():
+def test_user_data_store_playback_tracking(tmp_path):
     """UserDataStore tracks playback time, play count, and watched status."""
     from app.services.user_data import UserDataStore
-    data_dir = tempfile.mkdtemp()
+    data_dir = str(tmp_path)
     store = UserDataStore(data_dir=data_dir)
 
     # Defaults
@@ -707,10 +972,10 @@ def test_user_data_store_playback_tracking():
     assert store2.is_watched("t1") is True
 
 
-def test_user_data_store_process_event():
+def test_user_data_store_process_event(tmp_path):
     """process_heresphere_event updates position and counts closes."""
     from app.services.user_data import UserDataStore
-    data_dir = tempfile.mkdtemp()
+    data_dir = str(tmp_path)
     store = UserDataStore(data_dir=data_dir)
 
     # Open event (event=0) with position
@@ -743,32 +1008,21 @@ def test_user_data_store_process_event():
     assert store.is_watched("t1") is True
 
 
-def test_heresphere_event_endpoint(client, mocked_responses):
+def test_heresphere_event_endpoint(client, user_store):
     """POST /heresphere/event/<id> accepts events and returns 204."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
+    response = client.post(
+        "/heresphere/event/torrent1",
+        json={"event": 1, "time": 42.0, "speed": 1.0},
+        content_type="application/json",
     )
-    with patch('app.routes.heresphere._get_user_data') as mock_ud:
-        store = MagicMock()
-        mock_ud.return_value = store
-        response = client.post(
-            "/heresphere/event/torrent1",
-            json={"event": 1, "time": 42.0, "speed": 1.0},
-            content_type="application/json",
-        )
     assert response.status_code == 204
-    store.process_heresphere_event.assert_called_once_with(
+    user_store.process_heresphere_event.assert_called_once_with(
         "torrent1", {"event": 1, "time": 42.0, "speed": 1.0},
     )
 
 
-def test_heresphere_video_detail_has_event_server(client, mocked_responses):
+def test_heresphere_video_detail_has_event_server(client, mocked_responses, json_body):
     """Video detail includes eventServer URL."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
     mocked_responses.get(
         "https://api.real-debrid.com/rest/1.0/torrents/info/torrent1",
         json=MOCK_TORRENT_INFO, status=200,
@@ -778,17 +1032,13 @@ def test_heresphere_video_detail_has_event_server(client, mocked_responses):
         json={"needsMediaSource": False},
         content_type="application/json",
     )
-    data = response.json
+    data = json_body(response)
     assert "eventServer" in data
     assert "/heresphere/event/torrent1" in data["eventServer"]
 
 
-def test_heresphere_video_detail_unwatched_tag(client, mocked_responses):
+def test_heresphere_video_detail_unwatched_tag(client, mocked_responses, json_body):
     """Video detail includes Feature:Unwatched tag by default."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
     mocked_responses.get(
         "https://api.real-debrid.com/rest/1.0/torrents/info/torrent1",
         json=MOCK_TORRENT_INFO, status=200,
@@ -798,45 +1048,34 @@ def test_heresphere_video_detail_unwatched_tag(client, mocked_responses):
         json={"needsMediaSource": False},
         content_type="application/json",
     )
-    data = response.json
+    data = json_body(response)
     tag_names = [t["name"] for t in data["tags"]]
     assert "Feature:Unwatched" in tag_names
 
 
-def test_heresphere_video_detail_resume_position(client, mocked_responses):
+def test_heresphere_video_detail_resume_position(client, mocked_responses, user_store, json_body):
     """Video detail includes currentTime for resume playback."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
     mocked_responses.get(
         "https://api.real-debrid.com/rest/1.0/torrents/info/torrent1",
         json=MOCK_TORRENT_INFO, status=200,
     )
-    with patch('app.routes.heresphere._get_user_data') as mock_ud:
-        store = MagicMock()
-        mock_ud.return_value = store
-        store.is_favorite.return_value = False
-        store.get_rating.return_value = 0.0
-        store.is_watched.return_value = True
-        store.get_playback_time.return_value = 120.5
-        response = client.post(
-            "/heresphere/torrent1",
-            json={"needsMediaSource": False},
-            content_type="application/json",
-        )
-    data = response.json
+    user_store.is_favorite.return_value = False
+    user_store.get_rating.return_value = 0.0
+    user_store.is_watched.return_value = True
+    user_store.get_playback_time.return_value = 120.5
+    response = client.post(
+        "/heresphere/torrent1",
+        json={"needsMediaSource": False},
+        content_type="application/json",
+    )
+    data = json_body(response)
     # HereSphere uses milliseconds
     assert "currentTime" in data
     assert data["currentTime"] == 120500.0
 
 
-def test_heresphere_video_detail_zero_resume_when_no_playback(client, mocked_responses):
+def test_heresphere_video_detail_zero_resume_when_no_playback(client, mocked_responses, json_body):
     """currentTime is 0 when nothing has been played yet."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
     mocked_responses.get(
         "https://api.real-debrid.com/rest/1.0/torrents/info/torrent1",
         json=MOCK_TORRENT_INFO, status=200,
@@ -846,67 +1085,45 @@ def test_heresphere_video_detail_zero_resume_when_no_playback(client, mocked_res
         json={"needsMediaSource": False},
         content_type="application/json",
     )
-    data = response.json
+    data = json_body(response)
     assert data["currentTime"] == 0.0
 
 
 # ── DeoVR event endpoint tests ───────────────────────────────
 
-def test_deovr_event_endpoint(client, mocked_responses):
+def test_deovr_event_endpoint(client, user_store):
     """POST /deovr/event/<id> accepts events and returns 204."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
+    response = client.post(
+        "/deovr/event/torrent1",
+        json={"playerState": 1, "currentTime": 42.0},
+        content_type="application/json",
     )
-    with patch('app.routes.deovr._get_user_data') as mock_ud:
-        store = MagicMock()
-        mock_ud.return_value = store
-        response = client.post(
-            "/deovr/event/torrent1",
-            json={"playerState": 1, "currentTime": 42.0},
-            content_type="application/json",
-        )
     assert response.status_code == 204
-    store.update_playback_time.assert_called_once_with("torrent1", 42.0)
+    user_store.update_playback_time.assert_called_once_with("torrent1", 42.0)
 
 
-def test_deovr_event_close_increments_play_count(client, mocked_responses):
+def test_deovr_event_close_increments_play_count(client, user_store):
     """DeoVR playerState=2 (close) increments the play count."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
+    response = client.post(
+        "/deovr/event/torrent1",
+        json={"playerState": 2, "currentTime": 300.0},
+        content_type="application/json",
     )
-    with patch('app.routes.deovr._get_user_data') as mock_ud:
-        store = MagicMock()
-        mock_ud.return_value = store
-        response = client.post(
-            "/deovr/event/torrent1",
-            json={"playerState": 2, "currentTime": 300.0},
-            content_type="application/json",
-        )
     assert response.status_code == 204
-    store.update_playback_time.assert_called_once_with("torrent1", 300.0)
-    store.increment_play_count.assert_called_once_with("torrent1")
+    user_store.update_playback_time.assert_called_once_with("torrent1", 300.0)
+    user_store.increment_play_count.assert_called_once_with("torrent1")
 
 
-def test_deovr_event_non_json(client, mocked_responses):
+def test_deovr_event_non_json(client):
     """POST /deovr/event/<id> without JSON returns 204 gracefully."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
     response = client.post("/deovr/event/torrent1", data="not json")
     assert response.status_code == 204
 
 
 # ── DeoVR video detail enriched fields tests ─────────────────
 
-def test_deovr_video_detail_has_event_server(client, mocked_responses):
+def test_deovr_video_detail_has_event_server(client, mocked_responses, json_body):
     """DeoVR video detail includes eventServer URL."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
     mocked_responses.get(
         "https://api.real-debrid.com/rest/1.0/torrents/info/torrent1",
         json=MOCK_TORRENT_INFO, status=200,
@@ -917,97 +1134,72 @@ def test_deovr_video_detail_has_event_server(client, mocked_responses):
             "/deovr/torrent1",
             json={"needsMediaSource": True},
         )
-    data = response.json
+    data = json_body(response)
     assert "eventServer" in data
     assert "/deovr/event/torrent1" in data["eventServer"]
 
 
-def test_deovr_video_detail_resume_position(client, mocked_responses):
+def test_deovr_video_detail_resume_position(client, mocked_responses, user_store, json_body):
     """DeoVR video detail includes currentTime for resume."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
     mocked_responses.get(
         "https://api.real-debrid.com/rest/1.0/torrents/info/torrent1",
         json=MOCK_TORRENT_INFO, status=200,
     )
-    with patch('app.routes.deovr._get_user_data') as mock_ud, \
-         patch('app.services.real_debrid.RealDebridService.unrestrict_link') as mock_unrestrict:
-        store = MagicMock()
-        mock_ud.return_value = store
-        store.is_favorite.return_value = False
-        store.get_rating.return_value = 0.0
-        store.get_playback_time.return_value = 75.3
+    with patch('app.services.real_debrid.RealDebridService.unrestrict_link') as mock_unrestrict:
+        user_store.is_favorite.return_value = False
+        user_store.get_rating.return_value = 0.0
+        user_store.get_playback_time.return_value = 75.3
         mock_unrestrict.return_value = "https://unrestricted.real-debrid.com/video.mp4"
         response = client.post(
             "/deovr/torrent1",
             json={"needsMediaSource": True},
         )
-    data = response.json
+    data = json_body(response)
     # DeoVR uses seconds
     assert "currentTime" in data
     assert data["currentTime"] == 75.3
 
 
-def test_deovr_video_detail_rating(client, mocked_responses):
+def test_deovr_video_detail_rating(client, mocked_responses, user_store, json_body):
     """DeoVR video detail includes persisted rating."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
     mocked_responses.get(
         "https://api.real-debrid.com/rest/1.0/torrents/info/torrent1",
         json=MOCK_TORRENT_INFO, status=200,
     )
-    with patch('app.routes.deovr._get_user_data') as mock_ud, \
-         patch('app.services.real_debrid.RealDebridService.unrestrict_link') as mock_unrestrict:
-        store = MagicMock()
-        mock_ud.return_value = store
-        store.is_favorite.return_value = False
-        store.get_rating.return_value = 4.0
-        store.get_playback_time.return_value = 0.0
+    with patch('app.services.real_debrid.RealDebridService.unrestrict_link') as mock_unrestrict:
+        user_store.is_favorite.return_value = False
+        user_store.get_rating.return_value = 4.0
+        user_store.get_playback_time.return_value = 0.0
         mock_unrestrict.return_value = "https://unrestricted.real-debrid.com/video.mp4"
         response = client.post(
             "/deovr/torrent1",
             json={"needsMediaSource": True},
         )
-    data = response.json
+    data = json_body(response)
     assert data["rating"] == 4.0
 
 
-def test_deovr_write_favorite(client, mocked_responses):
+def test_deovr_write_favorite(client, mocked_responses, user_store):
     """POST /deovr/<id> with isFavorite persists it via write-back."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
     mocked_responses.get(
         "https://api.real-debrid.com/rest/1.0/torrents/info/torrent1",
         json=MOCK_TORRENT_INFO, status=200,
     )
-    with patch('app.routes.deovr._get_user_data') as mock_ud:
-        store = MagicMock()
-        mock_ud.return_value = store
-        store.is_favorite.return_value = True
-        store.get_rating.return_value = 0.0
-        store.get_playback_time.return_value = 0.0
-        response = client.post(
-            "/deovr/torrent1",
-            json={"needsMediaSource": False, "isFavorite": True},
-        )
+    user_store.is_favorite.return_value = True
+    user_store.get_rating.return_value = 0.0
+    user_store.get_playback_time.return_value = 0.0
+    response = client.post(
+        "/deovr/torrent1",
+        json={"needsMediaSource": False, "isFavorite": True},
+    )
     assert response.status_code == 200
-    store.process_heresphere_update.assert_called_once_with(
+    user_store.process_heresphere_update.assert_called_once_with(
         "torrent1", {"needsMediaSource": False, "isFavorite": True},
     )
 
 
-def test_deovr_metadata_includes_favorite(client, mocked_responses):
+def test_deovr_metadata_includes_favorite(client, mocked_responses, json_body):
     """DeoVR metadata-only response includes isFavorite."""
-    mocked_responses.get(
-        "https://api.real-debrid.com/rest/1.0/user",
-        json=MOCK_USER, status=200,
-    )
     mocked_responses.get(
         "https://api.real-debrid.com/rest/1.0/torrents/info/torrent1",
         json=MOCK_TORRENT_INFO, status=200,
@@ -1016,6 +1208,6 @@ def test_deovr_metadata_includes_favorite(client, mocked_responses):
         "/deovr/torrent1",
         json={"needsMediaSource": False},
     )
-    data = response.json
+    data = json_body(response)
     assert "isFavorite" in data
     assert data["isFavorite"] is False